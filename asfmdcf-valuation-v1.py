@@ -1,8 +1,10 @@
+import os
 import streamlit as st
 import pandas as pd
 import numpy as np
-import yfinance as yf
-from scipy.optimize import minimize
+import altair as alt
+from finmodel import (SCENARIOS, XLSX_MIME, SensitivitySurface, StageCache, StatementCache, ValuationPipeline,
+                      simulate_dcf)
 
 # Title of the Streamlit App
 st.title("Advanced Stock Financial Model & DCF Valuation")
@@ -10,113 +12,156 @@ st.title("Advanced Stock Financial Model & DCF Valuation")
 # User input for stock ticker
 ticker = st.text_input("Enter Stock Ticker (e.g., AAPL, BRK-B):", "BRK-B")
 
+# Every slider position is valued up front, so the grids must match the slider ranges
+DISCOUNT_RATES = np.arange(8, 16) / 100
+TERMINAL_GROWTH_RATES = np.arange(0, 4) / 100
+HORIZONS = np.arange(5, 11)
+
 # User inputs for modeling parameters
 discount_rate = st.slider("Select Discount Rate (%)", 8, 15, 10) / 100
 terminal_growth = st.slider("Select Terminal Growth Rate (%)", 0, 3, 1) / 100
 years = st.slider("Projection Years", 5, 10, 5)
 
+# Statements only change quarterly, so serve them from the local cache when fresh
+offline = st.sidebar.checkbox("Offline mode (cached statements only)", value=False)
+cache = StatementCache(offline=offline)
+
+@st.cache_resource
+def stage_cache():
+    """One memory-budgeted LRU of stage results, shared by every session."""
+    return StageCache()
+
+# Each stage reruns only when its own inputs change
+pipeline = ValuationPipeline(stage_cache(), cache)
+
 def get_financial_data(ticker):
-    """Fetches financial statements from Yahoo Finance."""
+    """Fetches financial statements and key metrics from Yahoo Finance, or the local cache."""
     try:
-        stock = yf.Ticker(ticker)
-        income_stmt = stock.financials
-        balance_sheet = stock.balance_sheet
-        cash_flow = stock.cashflow
-        return income_stmt, balance_sheet, cash_flow
+        return pipeline.fetch(ticker)
     except Exception as e:
         st.error(f"Error fetching data: {e}")
-        return None, None, None
-
-def forecast_cash_flows(ticker, years, growth_rate):
-    """Forecasts cash flows based on historical trends."""
-    try:
-        stock = yf.Ticker(ticker)
-        cash_flows = stock.cashflow.loc["Total Cash From Operating Activities"]
-        last_cf = cash_flows.iloc[0]
-
-        projected_cf = [last_cf * (1 + growth_rate) ** i for i in range(1, years + 1)]
-        return projected_cf
-    except Exception as e:
-        st.error(f"Forecasting Error: {e}")
         return None
 
-def discounted_cash_flow(ticker, discount_rate, terminal_growth, years):
-    """Performs a multi-scenario DCF valuation."""
+def sensitivity_surface(snapshot):
+    """Performs the multi-scenario DCF valuation for every slider position at once."""
     try:
-        base_growth = 0.05
-        optimistic_growth = base_growth + 0.03
-        pessimistic_growth = base_growth - 0.02
-
-        scenarios = {
-            "Base Case": base_growth,
-            "Optimistic Case": optimistic_growth,
-            "Pessimistic Case": pessimistic_growth
-        }
-        
-        valuations = {}
-        for scenario, growth in scenarios.items():
-            projected_cf = forecast_cash_flows(ticker, years, growth)
-            if projected_cf is None:
-                return None
-
-            dcf_value = sum(cf / ((1 + discount_rate) ** i) for i, cf in enumerate(projected_cf, 1))
-            terminal_value = (projected_cf[-1] * (1 + terminal_growth)) / (discount_rate - terminal_growth)
-            dcf_value += terminal_value / ((1 + discount_rate) ** years)
-            valuations[scenario] = dcf_value
-
-        return valuations
+        base_cf = pipeline.forecast(snapshot)
+        market_value = snapshot.info.get("marketCap")
+        return pipeline.stage("value", (base_cf, market_value, DISCOUNT_RATES, TERMINAL_GROWTH_RATES, HORIZONS),
+                              lambda: SensitivitySurface(base_cf, DISCOUNT_RATES, TERMINAL_GROWTH_RATES, HORIZONS,
+                                                         market_value=market_value))
     except Exception as e:
         st.error(f"DCF Calculation Error: {e}")
         return None
 
-def generate_report(ticker, discount_rate, terminal_growth, years):
-    """Generates an Excel financial report."""
+def generate_report(snapshot, valuations):
+    """Generates an Excel financial report; rebuilt only when the statements or valuations change."""
     try:
-        income_stmt, balance_sheet, cash_flow = get_financial_data(ticker)
-        valuations = discounted_cash_flow(ticker, discount_rate, terminal_growth, years)
-
-        if valuations is None:
-            return None
-
-        writer = pd.ExcelWriter(f"{ticker}_financials.xlsx", engine="xlsxwriter")
-        income_stmt.to_excel(writer, sheet_name="Income Statement")
-        balance_sheet.to_excel(writer, sheet_name="Balance Sheet")
-        cash_flow.to_excel(writer, sheet_name="Cash Flow Statement")
-
         valuation_df = pd.DataFrame(valuations.items(), columns=["Scenario", "DCF Valuation"])
-        valuation_df.to_excel(writer, sheet_name="Valuation Scenarios")
-
-        writer.close()
-        return f"{ticker}_financials.xlsx"
+        return pipeline.report(snapshot, {"Valuation Scenarios": valuation_df})
     except Exception as e:
         st.error(f"Report Generation Error: {e}")
         return None
 
+def sensitivity_heatmap(surface, years, scenario):
+    """Charts DCF value over discount rate x terminal growth for one horizon and scenario."""
+    grid = surface.grid(years, scenario)
+    grid.index = (grid.index * 100).round().astype(int)
+    grid.columns = (grid.columns * 100).round().astype(int)
+    data = grid.stack().reset_index()
+    data.columns = ["Discount Rate (%)", "Terminal Growth (%)", "Estimated Value ($)"]
+    return alt.Chart(data).mark_rect().encode(
+        x="Terminal Growth (%):O",
+        y="Discount Rate (%):O",
+        color="Estimated Value ($):Q",
+        tooltip=list(data.columns),
+    )
+
+def monte_carlo(snapshot, growth, discount_rate, terminal_growth, years, paths, seed, workers):
+    """Simulates the DCF distribution from sampled growth, discount and terminal growth rates."""
+    try:
+        return simulate_dcf(pipeline.forecast(snapshot), growth, discount_rate, terminal_growth, years,
+                            paths, seed=seed, workers=workers)
+    except Exception as e:
+        st.error(f"Monte Carlo Simulation Error: {e}")
+        return None
+
+def simulation_histogram(result):
+    """Charts the simulated DCF distribution."""
+    counts, edges = result.histogram(bins=50)
+    data = pd.DataFrame({"From ($)": edges[:-1], "To ($)": edges[1:], "Paths": counts})
+    return alt.Chart(data).mark_bar().encode(x=alt.X("From ($):Q", bin="binned"), x2="To ($):Q", y="Paths:Q")
+
+# Fetch and value once per ticker; later slider moves only look values up
 if st.button("Generate Financial Model"):
-    income_stmt, balance_sheet, cash_flow = get_financial_data(ticker)
-
-    if income_stmt is not None:
-        st.subheader("Income Statement")
-        st.write(income_stmt)
-
-        st.subheader("Balance Sheet")
-        st.write(balance_sheet)
-
-        st.subheader("Cash Flow Statement")
-        st.write(cash_flow)
-
-        valuations = discounted_cash_flow(ticker, discount_rate, terminal_growth, years)
-        if valuations:
-            st.subheader("DCF Valuation Scenarios")
-            st.write(pd.DataFrame(valuations.items(), columns=["Scenario", "Estimated Value ($)"]))
-
-        report_file = generate_report(ticker, discount_rate, terminal_growth, years)
-        if report_file:
-            with open(report_file, "rb") as file:
-                st.download_button(label="Download Financial Report",
-                                   data=file,
-                                   file_name=report_file,
-                                   mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+    snapshot = get_financial_data(ticker)
+    if snapshot is not None:
+        st.session_state["model"] = (snapshot, sensitivity_surface(snapshot))
+
+model = st.session_state.get("model")
+if model is not None and model[0].ticker == ticker:
+    snapshot, surface = model
+
+    st.subheader("Income Statement")
+    st.write(snapshot.income_stmt)
+
+    st.subheader("Balance Sheet")
+    st.write(snapshot.balance_sheet)
+
+    st.subheader("Cash Flow Statement")
+    st.write(snapshot.cash_flow)
+
+    valuations = surface.lookup(discount_rate, terminal_growth, years) if surface else None
+    if valuations:
+        st.subheader("DCF Valuation Scenarios")
+        st.write(pd.DataFrame(valuations.items(), columns=["Scenario", "Estimated Value ($)"]))
+
+        # Solved with the surface for every grid point, so this is a lookup too
+        implied = surface.lookup_implied_growth(discount_rate, terminal_growth, years)
+        if implied is not None:
+            st.write(f"**Market-Implied Growth:** {implied:.2%}" if np.isfinite(implied)
+                     else "**Market-Implied Growth:** no growth rate in [-50%, 100%] matches the market cap")
+
+        st.subheader("Sensitivity: Discount Rate vs Terminal Growth")
+        scenario = st.selectbox("Scenario", list(SCENARIOS))
+        st.altair_chart(sensitivity_heatmap(surface, years, scenario), use_container_width=True)
+
+    with st.expander("Monte Carlo Simulation"):
+        growth_mean = st.number_input("Growth Rate Mean (%)", value=5.0) / 100
+        growth_std = st.number_input("Growth Rate Std Dev (%)", value=2.0, min_value=0.0) / 100
+        rate_low, rate_high = st.slider("Discount Rate Range (%)", 5.0, 20.0, (8.0, 12.0), step=0.5)
+        tg_low, tg_high = st.slider("Terminal Growth Range (%)", 0.0, 5.0, (0.0, 3.0), step=0.25)
+        paths = int(st.number_input("Paths", min_value=10_000, max_value=50_000_000, value=1_000_000, step=100_000))
+        seed = int(st.number_input("Seed", value=42, step=1))
+        workers = st.slider("Worker Processes", 1, os.cpu_count() or 1, 1)
+
+        if st.button("Run Simulation"):
+            result = monte_carlo(snapshot,
+                                 ("normal", growth_mean, growth_std),
+                                 ("uniform", rate_low / 100, rate_high / 100),
+                                 ("uniform", tg_low / 100, tg_high / 100),
+                                 years, paths, seed, workers)
+            if result:
+                st.write(pd.DataFrame({"Percentile": [f"P{q}" for q in result.percentiles],
+                                       "Estimated Value ($)": list(result.percentiles.values())}))
+                st.altair_chart(simulation_histogram(result), use_container_width=True)
+                st.caption(f"{result.valid_paths:,} of {result.paths:,} paths valid, "
+                           f"mean ${result.mean:,.0f}, {result.paths_per_second:,.0f} paths/sec")
+
+    # The workbook is only built once asked for, then served from the cache
+    if valuations and st.button("Prepare Financial Report"):
+        st.session_state["report_ticker"] = ticker
+    if valuations and st.session_state.get("report_ticker") == ticker:
+        report = generate_report(snapshot, valuations)
+        if report:
+            st.download_button(label="Download Financial Report",
+                               data=report,
+                               file_name=f"{ticker}_financials.xlsx",
+                               mime=XLSX_MIME)
+
+# Stage cache hits and misses, shared across sessions
+with st.sidebar.expander("Pipeline Cache"):
+    st.dataframe(pd.DataFrame(stage_cache().stats(), columns=["Stage", "Hits", "Misses", "Entries", "MB"]))
 
 # Run with:
 # streamlit run app.py
@@ -1,6 +1,6 @@
 import streamlit as st
 import pandas as pd
-import yfinance as yf
+from finmodel import XLSX_MIME, StatementCache, dcf_values, fetch_snapshot, operating_cash_flow, report_bytes
 
 # Title of the Streamlit App
 st.title("Stock Financial Model & DCF Valuation")
@@ -8,76 +8,75 @@ st.title("Stock Financial Model & DCF Valuation")
 # User input for stock ticker
 ticker = st.text_input("Enter Stock Ticker (e.g., AAPL, BRK-B):", "BRK-B")
 
+# Statements only change quarterly, so serve them from the local cache when fresh
+offline = st.sidebar.checkbox("Offline mode (cached statements only)", value=False)
+cache = StatementCache(offline=offline)
+
 def get_financial_data(ticker):
-    """Fetches financial statements from Yahoo Finance."""
+    """Fetches financial statements from Yahoo Finance, or the local cache."""
     try:
-        stock = yf.Ticker(ticker)
-        income_stmt = stock.financials
-        balance_sheet = stock.balance_sheet
-        cash_flow = stock.cashflow
-        return income_stmt, balance_sheet, cash_flow
+        return fetch_snapshot(ticker, cache)
     except Exception as e:
         st.error(f"Error fetching data: {e}")
-        return None, None, None
+        return None
 
-def discounted_cash_flow(ticker, discount_rate=0.1, terminal_growth=0.02):
+def discounted_cash_flow(snapshot, discount_rate=0.1, terminal_growth=0.02):
     """Performs a simple DCF valuation based on operating cash flows."""
     try:
-        stock = yf.Ticker(ticker)
-        cash_flows = stock.cashflow.loc["Total Cash From Operating Activities"]
-        projected_cf = [cash_flows.iloc[0] * (1 + terminal_growth) ** i for i in range(1, 6)]
-        dcf_value = sum(cf / ((1 + discount_rate) ** i) for i, cf in enumerate(projected_cf, 1))
-        return dcf_value
+        dcf_value = dcf_values(operating_cash_flow(snapshot), terminal_growth, discount_rate,
+                               horizons=5, include_terminal=False)
+        return float(dcf_value)
     except Exception as e:
         st.error(f"DCF Calculation Error: {e}")
         return None
 
-def generate_report(ticker):
+@st.cache_data(max_entries=100, show_spinner=False)
+def build_report(ticker, data_version, _snapshot, _dcf_value):
+    """Builds the report workbook in memory; cached by ticker and data version."""
+    summary_df = pd.DataFrame({"DCF Valuation": [_dcf_value]})
+    return report_bytes(_snapshot, {"Summary": summary_df})
+
+def generate_report(snapshot, dcf_value):
     """Generates an Excel financial report."""
     try:
-        income_stmt, balance_sheet, cash_flow = get_financial_data(ticker)
-        dcf_value = discounted_cash_flow(ticker)
-
-        writer = pd.ExcelWriter(f"{ticker}_financials.xlsx", engine="xlsxwriter")
-        income_stmt.to_excel(writer, sheet_name="Income Statement")
-        balance_sheet.to_excel(writer, sheet_name="Balance Sheet")
-        cash_flow.to_excel(writer, sheet_name="Cash Flow Statement")
-        pd.DataFrame({"DCF Valuation": [dcf_value]}).to_excel(writer, sheet_name="Summary")
-        writer.close()
-        
-        return f"{ticker}_financials.xlsx"
+        return build_report(snapshot.ticker, snapshot.data_version(), snapshot, dcf_value)
     except Exception as e:
         st.error(f"Report Generation Error: {e}")
         return None
 
-# Fetch financial data
+# Fetch and value once per click; the results stay on the page while the report is prepared
 if st.button("Generate Financial Model"):
-    income_stmt, balance_sheet, cash_flow = get_financial_data(ticker)
+    snapshot = get_financial_data(ticker)
+    if snapshot is not None:
+        st.session_state["model"] = (snapshot, discounted_cash_flow(snapshot))
+
+model = st.session_state.get("model")
+if model is not None and model[0].ticker == ticker:
+    snapshot, dcf_value = model
 
-    if income_stmt is not None:
-        st.subheader("Income Statement")
-        st.write(income_stmt)
+    st.subheader("Income Statement")
+    st.write(snapshot.income_stmt)
 
-        st.subheader("Balance Sheet")
-        st.write(balance_sheet)
+    st.subheader("Balance Sheet")
+    st.write(snapshot.balance_sheet)
 
-        st.subheader("Cash Flow Statement")
-        st.write(cash_flow)
+    st.subheader("Cash Flow Statement")
+    st.write(snapshot.cash_flow)
 
-        # Perform DCF Valuation
-        dcf_value = discounted_cash_flow(ticker)
-        if dcf_value:
-            st.subheader("DCF Valuation")
-            st.write(f"Estimated Intrinsic Value: **${dcf_value:,.2f}**")
+    if dcf_value:
+        st.subheader("DCF Valuation")
+        st.write(f"Estimated Intrinsic Value: **${dcf_value:,.2f}**")
 
-        # Generate Report
-        report_file = generate_report(ticker)
-        if report_file:
-            with open(report_file, "rb") as file:
-                st.download_button(label="Download Financial Report",
-                                   data=file,
-                                   file_name=report_file,
-                                   mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+    # The workbook is only built once asked for, then served from the cache
+    if st.button("Prepare Financial Report"):
+        st.session_state["report_ticker"] = ticker
+    if st.session_state.get("report_ticker") == ticker:
+        report = generate_report(snapshot, dcf_value)
+        if report:
+            st.download_button(label="Download Financial Report",
+                               data=report,
+                               file_name=f"{ticker}_financials.xlsx",
+                               mime=XLSX_MIME)
 
 # Run the app with:
 # streamlit run app.py
@@ -1,8 +1,9 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import yfinance as yf
-from scipy.optimize import minimize
+from io import BytesIO
+from finmodel import (RATIO_NAMES, SCENARIOS, XLSX_MIME, ConsolidatedExport, RateLimiter, StageCache, StatementCache,
+                      ValuationPipeline, dcf_values, implied_growth, run_concurrently)
 
 # Title of the Streamlit App
 st.title("Comprehensive Stock Financial Model & Valuation")
@@ -15,140 +16,176 @@ discount_rate = st.slider("Select Discount Rate (%)", 8, 15, 10) / 100
 terminal_growth = st.slider("Select Terminal Growth Rate (%)", 0, 3, 1) / 100
 years = st.slider("Projection Years", 5, 10, 5)
 
+# Statements only change quarterly, so serve them from the local cache when fresh
+offline = st.sidebar.checkbox("Offline mode (cached statements only)", value=False)
+cache = StatementCache(offline=offline)
+
+# Bounded pool and per-host request rate for "Run all"
+max_workers = st.sidebar.slider("Parallel fetches", 1, 16, 8)
+limiter = RateLimiter(rate=st.sidebar.slider("Requests per second", 1, 20, 5))
+
+@st.cache_resource
+def stage_cache():
+    """One memory-budgeted LRU of stage results, shared by every session."""
+    return StageCache()
+
+# Each stage reruns only when its own inputs change, so moving a slider skips the fetch
+pipeline = ValuationPipeline(stage_cache(), cache, limiter)
+
 def get_financial_data(ticker):
-    """Fetches financial statements and key metrics from Yahoo Finance."""
+    """Fetches financial statements and key metrics from Yahoo Finance, or the local cache."""
     try:
-        stock = yf.Ticker(ticker)
-        income_stmt = stock.financials
-        balance_sheet = stock.balance_sheet
-        cash_flow = stock.cashflow
-        key_stats = stock.info
-        return income_stmt, balance_sheet, cash_flow, key_stats
+        return pipeline.fetch(ticker)
     except Exception as e:
         st.error(f"Error fetching data for {ticker}: {e}")
-        return None, None, None, None
-
-def forecast_cash_flows(ticker, years, growth_rate):
-    """Forecasts cash flows based on historical trends."""
-    try:
-        stock = yf.Ticker(ticker)
-        cash_flows = stock.cashflow.loc["Total Cash From Operating Activities"]
-        last_cf = cash_flows.iloc[0]
-
-        projected_cf = [last_cf * (1 + growth_rate) ** i for i in range(1, years + 1)]
-        return projected_cf
-    except Exception as e:
-        st.error(f"Forecasting Error for {ticker}: {e}")
         return None
 
-def discounted_cash_flow(ticker, discount_rate, terminal_growth, years):
+def discounted_cash_flow(snapshot, discount_rate, terminal_growth, years):
     """Performs a multi-scenario DCF valuation."""
     try:
-        base_growth = 0.05
-        optimistic_growth = base_growth + 0.03
-        pessimistic_growth = base_growth - 0.02
-
-        scenarios = {
-            "Base Case": base_growth,
-            "Optimistic Case": optimistic_growth,
-            "Pessimistic Case": pessimistic_growth
-        }
-        
-        valuations = {}
-        for scenario, growth in scenarios.items():
-            projected_cf = forecast_cash_flows(ticker, years, growth)
-            if projected_cf is None:
-                return None
-
-            dcf_value = sum(cf / ((1 + discount_rate) ** i) for i, cf in enumerate(projected_cf, 1))
-            terminal_value = (projected_cf[-1] * (1 + terminal_growth)) / (discount_rate - terminal_growth)
-            dcf_value += terminal_value / ((1 + discount_rate) ** years)
-            valuations[scenario] = dcf_value
-
-        return valuations
+        return pipeline.value(pipeline.forecast(snapshot), discount_rate, terminal_growth, years)
     except Exception as e:
-        st.error(f"DCF Calculation Error for {ticker}: {e}")
+        st.error(f"DCF Calculation Error for {snapshot.ticker}: {e}")
         return None
 
-def peer_comparison(ticker):
+def peer_comparison(snapshot):
     """Compares key financial ratios to industry peers."""
     try:
-        stock = yf.Ticker(ticker)
-        info = stock.info
-        return {
-            "Market Cap": info.get("marketCap"),
-            "PE Ratio": info.get("trailingPE"),
-            "EV/EBITDA": info.get("enterpriseValue") / info.get("ebitda") if info.get("ebitda") else None,
-            "Debt to Equity": info.get("debtToEquity"),
-            "Return on Equity (ROE)": info.get("returnOnEquity"),
-            "Price to Book (P/B)": info.get("priceToBook")
-        }
+        return pipeline.ratios(snapshot)
     except Exception as e:
-        st.error(f"Error fetching peer comparison data for {ticker}: {e}")
+        st.error(f"Error fetching peer comparison data for {snapshot.ticker}: {e}")
         return None
 
-def generate_report(ticker, discount_rate, terminal_growth, years):
-    """Generates an Excel financial report for a given stock."""
+def generate_report(snapshot, valuations, ratios):
+    """Generates an Excel financial report for a given stock; rebuilt only when its inputs change."""
     try:
-        income_stmt, balance_sheet, cash_flow, key_stats = get_financial_data(ticker)
-        valuations = discounted_cash_flow(ticker, discount_rate, terminal_growth, years)
-        ratios = peer_comparison(ticker)
-
-        if valuations is None or ratios is None:
-            return None
-
-        writer = pd.ExcelWriter(f"{ticker}_financials.xlsx", engine="xlsxwriter")
-        income_stmt.to_excel(writer, sheet_name="Income Statement")
-        balance_sheet.to_excel(writer, sheet_name="Balance Sheet")
-        cash_flow.to_excel(writer, sheet_name="Cash Flow Statement")
-
         valuation_df = pd.DataFrame(valuations.items(), columns=["Scenario", "DCF Valuation"])
-        valuation_df.to_excel(writer, sheet_name="Valuation Scenarios")
-
         ratios_df = pd.DataFrame(ratios.items(), columns=["Metric", "Value"])
-        ratios_df.to_excel(writer, sheet_name="Peer Comparison")
-
-        writer.close()
-        return f"{ticker}_financials.xlsx"
+        return pipeline.report(snapshot, {"Valuation Scenarios": valuation_df, "Peer Comparison": ratios_df})
     except Exception as e:
-        st.error(f"Report Generation Error for {ticker}: {e}")
+        st.error(f"Report Generation Error for {snapshot.ticker}: {e}")
         return None
 
-# Loop through multiple stocks
-ticker_list = [t.strip().upper() for t in tickers.split(",")]
+def fetch_for_comparison(ticker):
+    """Fetches one ticker's base cash flow and ratios for the comparison table, raising on failure."""
+    snapshot = pipeline.fetch(ticker)
+    return pipeline.forecast(snapshot), pipeline.ratios(snapshot)
 
+def export_row(snapshot):
+    """Values one ticker for the consolidated workbook's Valuations sheet."""
+    base_cf = pipeline.forecast(snapshot)
+    ratios = pipeline.ratios(snapshot)
+    implied = implied_growth(base_cf, ratios["Market Cap"] or np.nan, discount_rate, terminal_growth, years)
+    return {**pipeline.value(base_cf, discount_rate, terminal_growth, years),
+            "Implied Growth": float(implied), **ratios}
+
+# Loop through multiple stocks
+ticker_list = [t.strip().upper() for t in tickers.split(",") if t.strip()]
+
+# Fetch every ticker at once, then value all of them in one array pass;
+# a failing ticker only fills its own Error cell
+if st.button("Run all"):
+    rows = {}
+    fetched = {}
+    progress = st.progress(0)
+    for done, (ticker, result, error) in enumerate(run_concurrently(ticker_list, fetch_for_comparison, max_workers), 1):
+        if error is None:
+            fetched[ticker] = result
+        else:
+            rows[ticker] = {"Error": str(error)}
+        progress.progress(done / len(ticker_list))
+
+    if fetched:
+        base_cash_flows = np.array([base_cf for base_cf, _ in fetched.values()], dtype=float)
+        market_caps = np.array([ratios["Market Cap"] or np.nan for _, ratios in fetched.values()], dtype=float)
+        values = dcf_values(base_cash_flows[:, None], list(SCENARIOS.values()),
+                            discount_rate, terminal_growth, years)
+        implied = implied_growth(base_cash_flows, market_caps, discount_rate, terminal_growth, years)
+        for (ticker, (_, ratios)), ticker_values, ticker_implied in zip(fetched.items(), values, implied):
+            rows[ticker] = {**dict(zip(SCENARIOS, ticker_values)), "Implied Growth": ticker_implied, **ratios}
+
+    st.subheader("Valuation Comparison")
+    st.dataframe(pd.DataFrame.from_dict(rows, orient="index").reindex(ticker_list))
+
+# One workbook for every ticker, written as each fetch completes so memory stays flat
+include_parquet = st.checkbox("Also export Parquet", value=False)
+if st.button("Export Consolidated Workbook"):
+    workbook = BytesIO()
+    statements_parquet = BytesIO() if include_parquet else None
+    valuations_parquet = BytesIO() if include_parquet else None
+    failures = {}
+    progress = st.progress(0)
+    with ConsolidatedExport(workbook, [*SCENARIOS, "Implied Growth", *RATIO_NAMES],
+                            statements_parquet, valuations_parquet) as export:
+        for done, (ticker, snapshot, error) in enumerate(run_concurrently(ticker_list, pipeline.fetch, max_workers), 1):
+            try:
+                if error is not None:
+                    raise error
+                export.add(snapshot, export_row(snapshot))
+            except Exception as e:
+                failures[ticker] = str(e)
+            progress.progress(done / len(ticker_list))
+
+    if failures:
+        st.warning(f"{len(failures)} of {len(ticker_list)} tickers could not be exported")
+        st.write(pd.DataFrame(failures.items(), columns=["Ticker", "Error"]))
+    st.download_button(label="Download Consolidated Workbook",
+                       data=workbook.getvalue(),
+                       file_name="consolidated_financials.xlsx",
+                       mime=XLSX_MIME)
+    if include_parquet:
+        st.download_button(label="Download Statements (Parquet)",
+                           data=statements_parquet.getvalue(),
+                           file_name="consolidated_statements.parquet",
+                           mime="application/octet-stream")
+        st.download_button(label="Download Valuations (Parquet)",
+                           data=valuations_parquet.getvalue(),
+                           file_name="consolidated_valuations.parquet",
+                           mime="application/octet-stream")
+
+# The chosen ticker stays on the page across reruns; its stages are served from the shared cache
 for ticker in ticker_list:
     if st.button(f"Generate Financial Model for {ticker}"):
-        income_stmt, balance_sheet, cash_flow, key_stats = get_financial_data(ticker)
-
-        if income_stmt is not None:
-            st.subheader(f"Financial Statements for {ticker}")
-            st.subheader("Income Statement")
-            st.write(income_stmt)
-
-            st.subheader("Balance Sheet")
-            st.write(balance_sheet)
-
-            st.subheader("Cash Flow Statement")
-            st.write(cash_flow)
-
-            valuations = discounted_cash_flow(ticker, discount_rate, terminal_growth, years)
-            if valuations:
-                st.subheader(f"DCF Valuation for {ticker}")
-                st.write(pd.DataFrame(valuations.items(), columns=["Scenario", "Estimated Value ($)"]))
-
-            ratios = peer_comparison(ticker)
-            if ratios:
-                st.subheader(f"Peer Comparison for {ticker}")
-                st.write(pd.DataFrame(ratios.items(), columns=["Metric", "Value"]))
-
-            report_file = generate_report(ticker, discount_rate, terminal_growth, years)
-            if report_file:
-                with open(report_file, "rb") as file:
-                    st.download_button(label=f"Download {ticker} Report",
-                                       data=file,
-                                       file_name=report_file,
-                                       mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+        snapshot = get_financial_data(ticker)
+        if snapshot is not None:
+            st.session_state["model"] = snapshot
+
+    snapshot = st.session_state.get("model")
+    if snapshot is not None and snapshot.ticker == ticker:
+        st.subheader(f"Financial Statements for {ticker}")
+        st.subheader("Income Statement")
+        st.write(snapshot.income_stmt)
+
+        st.subheader("Balance Sheet")
+        st.write(snapshot.balance_sheet)
+
+        st.subheader("Cash Flow Statement")
+        st.write(snapshot.cash_flow)
+
+        valuations = discounted_cash_flow(snapshot, discount_rate, terminal_growth, years)
+        if valuations:
+            st.subheader(f"DCF Valuation for {ticker}")
+            st.write(pd.DataFrame(valuations.items(), columns=["Scenario", "Estimated Value ($)"]))
+
+        ratios = peer_comparison(snapshot)
+        if ratios:
+            st.subheader(f"Peer Comparison for {ticker}")
+            st.write(pd.DataFrame(ratios.items(), columns=["Metric", "Value"]))
+
+        # The workbook is only built once asked for, then served from the cache
+        if valuations and ratios and st.button(f"Prepare {ticker} Report"):
+            st.session_state["report_ticker"] = ticker
+        if valuations and ratios and st.session_state.get("report_ticker") == ticker:
+            report = generate_report(snapshot, valuations, ratios)
+            if report:
+                st.download_button(label=f"Download {ticker} Report",
+                                   data=report,
+                                   file_name=f"{ticker}_financials.xlsx",
+                                   mime=XLSX_MIME)
+
+# Stage cache hits and misses, shared across sessions
+with st.sidebar.expander("Pipeline Cache"):
+    st.dataframe(pd.DataFrame(stage_cache().stats(), columns=["Stage", "Hits", "Misses", "Entries", "MB"]))
 
 # Run with:
 # streamlit run app.py
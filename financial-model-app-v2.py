@@ -1,5 +1,9 @@
 import streamlit as st
-import pandas as pd
+import numpy as np
+from finmodel import STATEMENT_LINES, ModelStore, project_statements
+
+# Entered data is appended as a new version per (company, period) in a shared SQLite store
+model_store = ModelStore()
 
 # App navigation
 st.sidebar.title("Financial Model App")
@@ -14,6 +18,9 @@ if page == "Home":
 elif page == "Enter Financial Data":
     st.title("Enter Financial Data")
 
+    company = st.text_input("Company")
+    period = st.text_input("Period (e.g. 2024-Q4)")
+
     st.subheader("Balance Sheet Inputs")
     debt = st.number_input("Debt", value=0)
     other_liabilities = st.number_input("Other Liabilities", value=0)
@@ -107,20 +114,42 @@ elif page == "Enter Financial Data":
     }
 
     if st.button("Save Data"):
-        df = pd.DataFrame([user_data])
-        df.to_csv("financial_data.csv", index=False)
-        st.success("Financial Data Saved!")
+        if not company or not period:
+            st.warning("Enter a company and period before saving.")
+        else:
+            version = model_store.save("v2", company, period, user_data)
+            st.success(f"Financial Data Saved! ({company} {period}, version {version})")
 
 # Model Output Page
 elif page == "Model Output":
     st.title("Financial Model Output")
     
-    try:
-        df = pd.read_csv("financial_data.csv")
+    df = model_store.latest("v2")
+    if df.empty:
+        st.warning("No data found. Please enter financial data first.")
+    else:
         st.write("### User Inputs:")
         st.dataframe(df)
-        
-        # Placeholder for model calculations
-        st.write("### Financial Model Results (Coming Soon)")
-    except:
-        st.warning("No data found. Please enter financial data first.")
+
+        # Project the chosen entry over every period and growth scenario in one array pass
+        st.write("### Financial Model Results")
+        entry = st.selectbox("Entry", df.index, format_func=lambda i: f"{df.at[i, 'Company']} {df.at[i, 'Period']}")
+        base = df.loc[entry].to_dict()
+        periods = st.slider("Projection Periods", 1, 40, 5)
+        # Centre the default range on the entered growth, clamped so both ends stay within the slider
+        entered_growth = min(max(float(base.get("Revenue Growth") or 0), -20.0), 50.0)
+        growth_low, growth_high = st.slider("Revenue Growth Range (%)", -20.0, 50.0,
+                                            (max(entered_growth - 5, -20.0), min(entered_growth + 5, 50.0)), step=0.5)
+        scenario_count = st.slider("Scenarios", 1, 500, 101)
+        growth = np.linspace(growth_low, growth_high, scenario_count) / 100
+        projection = project_statements(base, periods, growth)
+
+        scenario = (st.slider("Scenario Shown", 1, scenario_count, (scenario_count + 1) // 2) - 1
+                    if scenario_count > 1 else 0)
+        st.caption(f"Growth {growth[scenario]:.2%} per period")
+        for name in STATEMENT_LINES:
+            st.write(f"#### {name}")
+            st.dataframe(projection.statement(name, scenario))
+
+        st.write("#### Final-Period Outcomes by Growth Scenario")
+        st.line_chart(projection.summary().set_index("Growth")[["Net Income", "CFFO", "Cash"]])
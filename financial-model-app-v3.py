@@ -1,5 +1,8 @@
 import streamlit as st
-import pandas as pd
+from finmodel import ModelStore
+
+# Entered data is appended as a new version per (company, period) in a shared SQLite store
+model_store = ModelStore()
 
 # App Navigation
 st.sidebar.title("Financial Model App")
@@ -14,6 +17,9 @@ if page == "Home":
 elif page == "Enter Financial Data":
     st.title("Enter Financial Data")
 
+    company = st.text_input("Company")
+    period = st.text_input("Period (e.g. 2024-Q4)")
+
     # Customer & Revenue Inputs
     st.subheader("Customer & Revenue Metrics")
     total_customers = st.number_input("Total Customers", value=0)
@@ -75,20 +81,22 @@ elif page == "Enter Financial Data":
     }
 
     if st.button("Save Data"):
-        df = pd.DataFrame([user_data])
-        df.to_csv("financial_data.csv", index=False)
-        st.success("Financial Data Saved!")
+        if not company or not period:
+            st.warning("Enter a company and period before saving.")
+        else:
+            version = model_store.save("v3", company, period, user_data)
+            st.success(f"Financial Data Saved! ({company} {period}, version {version})")
 
 # Model Output Page
 elif page == "Model Output":
     st.title("Financial Model Output")
     
-    try:
-        df = pd.read_csv("financial_data.csv")
+    df = model_store.latest("v3")
+    if df.empty:
+        st.warning("No data found. Please enter financial data first.")
+    else:
         st.write("### User Inputs:")
         st.dataframe(df)
         
         # Placeholder for financial calculations
         st.write("### Financial Model Results (Coming Soon)")
-    except:
-        st.warning("No data found. Please enter financial data first.")
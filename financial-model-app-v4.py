@@ -1,31 +1,32 @@
 import streamlit as st
 import pandas as pd
 import os
-import pdfplumber
-import openpyxl
-
-# Function to extract text from PDFs
-def extract_text_from_pdf(uploaded_files):
-    extracted_texts = []
-    for uploaded_file in uploaded_files:
-        with pdfplumber.open(uploaded_file) as pdf:
-            text = "\n".join([page.extract_text() for page in pdf.pages if page.extract_text()])
-            extracted_texts.append(text)
-    return extracted_texts
-
-# Function to read Excel or CSV files
-def read_excel_or_csv(uploaded_file):
-    if uploaded_file.name.endswith(".csv"):
-        return pd.read_csv(uploaded_file)
-    elif uploaded_file.name.endswith(".xlsx"):
-        return pd.read_excel(uploaded_file, engine='openpyxl')
-    else:
-        return None
+from finmodel import (KEY_COLUMNS, V4_GRAPH, ExtractionStore, ModelStore, PageCache, extract_statement_fields,
+                      file_hash, iter_pdf_pages, iter_pdf_text, read_excel_or_csv)
+
+# Extracted PDF pages are cached by (file hash, page), so reruns and re-uploads skip extraction
+page_cache = PageCache()
+
+# Saved extractions: Parquet tables and compressed text, indexed by a manifest keyed on file hash
+extraction_store = ExtractionStore()
+
+# Entered data is appended as a new version per (company, period) in a shared SQLite store
+model_store = ModelStore()
 
-# Function to generate a simple financial model (placeholder)
-def generate_financial_model(df):
-    df["Profit Margin (%)"] = (df["Net Income"] / df["Total Revenue"]) * 100
-    return df
+# Function to generate the financial model: margins, opex ratios, tax rate, implied EPS and growth-adjusted figures.
+# Given the input columns changed since ``previous`` was generated, only their downstream metrics are recomputed.
+def generate_financial_model(df, changed=None, previous=None):
+    return V4_GRAPH.compute(df, changed, previous)
+
+# Statement fields of a PDF, cached by file hash so reruns skip table extraction
+@st.cache_data(max_entries=100, show_spinner=False)
+def statement_fields(digest, _data):
+    fields, _ = extract_statement_fields(_data, page_cache)
+    return fields
+
+# Prefills a data-entry field with the value extracted from the chosen PDF, if any
+def prefilled(fields, field, default):
+    return type(default)(fields.get(field, default))
 
 # Sidebar Navigation
 st.sidebar.title("Financial Modeling App")
@@ -45,47 +46,100 @@ elif page == "Upload Documents":
         extracted_data = []
         for uploaded_file in uploaded_files:
             if uploaded_file.name.endswith(".pdf"):
-                text_data = extract_text_from_pdf([uploaded_file])
-                extracted_data.append("\n".join(text_data))
+                progress = st.progress(0.0, text=f"Extracting {uploaded_file.name}")
+
+                def show_progress(done, total):
+                    progress.progress(done / total if total else 1.0,
+                                      text=f"Extracting {uploaded_file.name}: {done}/{total} pages")
+
+                # Pages stream into the page cache without being held here; saving reads them back in order
+                for _ in iter_pdf_pages(uploaded_file.getvalue(), page_cache, progress=show_progress):
+                    pass
+                extracted_data.append((uploaded_file, None))
+
+                # Statement pages are found from the cached page text; only they get table extraction
+                digest = file_hash(uploaded_file.getvalue())
+                try:
+                    fields = statement_fields(digest, uploaded_file.getvalue())
+                except Exception as e:
+                    st.error(f"Error extracting statements from {uploaded_file.name}: {e}")
+                    fields = {}
+                if fields:
+                    st.write(f"**Statement Fields from {uploaded_file.name}:**")
+                    st.dataframe(pd.DataFrame(fields.items(), columns=["Field", "Value"]))
+                    # Kept per filing, so fields from different documents are never mixed
+                    st.session_state.setdefault("pdf_fields", {})[digest] = (uploaded_file.name, fields)
             elif uploaded_file.name.endswith((".csv", ".xlsx")):
                 df = read_excel_or_csv(uploaded_file)
                 if df is not None:
                     st.write(f"**Extracted Data from {uploaded_file.name}:**")
                     st.dataframe(df)
-                    extracted_data.append(df.to_dict())
+                    extracted_data.append((uploaded_file, df))
 
         if st.button("Save Extracted Data"):
-            with open("extracted_data.txt", "w") as f:
-                f.write(str(extracted_data))
-            st.success("Data saved successfully!")
+            try:
+                saved = 0
+                for uploaded_file, data in extracted_data:
+                    digest = file_hash(uploaded_file.getvalue())
+                    if data is None:
+                        text = iter_pdf_text(uploaded_file.getvalue(), page_cache)
+                        saved += extraction_store.add_text(digest, uploaded_file.name, text)
+                    else:
+                        saved += extraction_store.add_table(digest, uploaded_file.name, data)
+                st.success(f"Data saved successfully! ({saved} new, {len(extracted_data) - saved} already stored)")
+            except Exception as e:
+                st.error(f"Error saving extracted data: {e}")
+
+    # Reopen earlier extractions straight from the store, without the original files
+    saved_extractions = extraction_store.manifest()
+    if saved_extractions:
+        with st.expander("Previously Extracted Data"):
+            digest = st.selectbox("Extraction", list(saved_extractions),
+                                  format_func=lambda digest: saved_extractions[digest]["name"])
+            if saved_extractions[digest]["kind"] == "table":
+                st.dataframe(extraction_store.load_table(digest))
+            else:
+                st.text(extraction_store.load_text(digest))
 
 # Data Entry Page
 elif page == "Enter Financial Data":
     st.title("Enter Financial Data Manually")
 
+    company = st.text_input("Company")
+    period = st.text_input("Period (e.g. 2024-Q4)")
+
+    # Statement fields from one uploaded filing prefill the inputs below
+    pdf_fields = st.session_state.get("pdf_fields", {})
+    fields = {}
+    if pdf_fields:
+        source = st.selectbox("Prefill from", [None, *pdf_fields],
+                              format_func=lambda digest: "None" if digest is None else pdf_fields[digest][0])
+        if source is not None:
+            fields = pdf_fields[source][1]
+
     # Input fields for financial data
     total_customers = st.number_input("Total Customers", value=0)
     arpu = st.number_input("ARPU ($)", value=0.0)
     commercial_revenue = st.number_input("Commercial Revenue", value=0)
     government_revenue = st.number_input("Government Revenue", value=0)
-    total_revenue = st.number_input("Total Revenue", value=0)
+    total_revenue = st.number_input("Total Revenue", value=prefilled(fields, "Total Revenue", 0))
 
     # Expenses
-    cogs = st.number_input("Cost of Goods Sold (COGS)", value=0)
-    gross_profit = st.number_input("Gross Profit", value=0)
-    sales_marketing = st.number_input("Sales & Marketing (S&M)", value=0)
-    r_d = st.number_input("Research & Development (R&D)", value=0)
-    g_a = st.number_input("General & Administrative (G&A)", value=0)
-    opex = st.number_input("Operating Expenses (OpEx)", value=0)
+    cogs = st.number_input("Cost of Goods Sold (COGS)", value=prefilled(fields, "COGS", 0))
+    gross_profit = st.number_input("Gross Profit", value=prefilled(fields, "Gross Profit", 0))
+    sales_marketing = st.number_input("Sales & Marketing (S&M)", value=prefilled(fields, "Sales & Marketing", 0))
+    r_d = st.number_input("Research & Development (R&D)", value=prefilled(fields, "R&D", 0))
+    g_a = st.number_input("General & Administrative (G&A)", value=prefilled(fields, "G&A", 0))
+    opex = st.number_input("Operating Expenses (OpEx)", value=prefilled(fields, "OpEx", 0))
 
     # Profitability & EPS
-    operating_income = st.number_input("Operating Income (OpInc)", value=0)
-    interest_expense = st.number_input("Interest Expense", value=0)
-    pretax_income = st.number_input("Pretax Income", value=0)
-    taxes = st.number_input("Taxes", value=0)
-    net_income = st.number_input("Net Income", value=0)
-    eps = st.number_input("Earnings Per Share (EPS)", value=0.0)
-    shares_outstanding = st.number_input("Shares Outstanding", value=0)
+    operating_income = st.number_input("Operating Income (OpInc)", value=prefilled(fields, "Operating Income", 0))
+    interest_expense = st.number_input("Interest Expense", value=prefilled(fields, "Interest Expense", 0))
+    pretax_income = st.number_input("Pretax Income", value=prefilled(fields, "Pretax Income", 0))
+    taxes = st.number_input("Taxes", value=prefilled(fields, "Taxes", 0))
+    net_income = st.number_input("Net Income", value=prefilled(fields, "Net Income", 0))
+    eps = st.number_input("Earnings Per Share (EPS)", value=prefilled(fields, "EPS", 0.0))
+    shares_outstanding = st.number_input("Shares Outstanding", value=prefilled(fields, "Shares Outstanding", 0))
 
     # Growth Rates
     customers_yoy = st.number_input("Customer Growth y/y (%)", value=0)
@@ -119,21 +173,32 @@ elif page == "Enter Financial Data":
     }
 
     if st.button("Save Data"):
-        df = pd.DataFrame([user_data])
-        df.to_csv("financial_data.csv", index=False)
-        st.success("Financial Data Saved!")
+        if not company or not period:
+            st.warning("Enter a company and period before saving.")
+        else:
+            version = model_store.save("v4", company, period, user_data)
+            st.success(f"Financial Data Saved! ({company} {period}, version {version})")
 
 # Model Generation Page
 elif page == "Generate Model":
     st.title("Generate Financial Model")
 
-    try:
-        df = pd.read_csv("financial_data.csv")
+    df = model_store.latest("v4")
+    if df.empty:
+        st.warning("No financial data found. Please enter data first.")
+    else:
         st.write("### User Inputs:")
-        st.dataframe(df)
-
-        # Financial Model Computation
-        df = generate_financial_model(df)
+        df = st.data_editor(df, disabled=KEY_COLUMNS)
+
+        # Financial Model Computation, recomputing only metrics that depend on edited columns
+        previous_inputs, previous_model = st.session_state.get("generated_model", (None, None))
+        changed = None
+        if previous_inputs is not None and previous_inputs.index.equals(df.index) \
+                and list(previous_inputs.columns) == list(df.columns):
+            changed = [column for column in df.columns if not df[column].equals(previous_inputs[column])]
+        model = generate_financial_model(df, changed, previous_model)
+        st.session_state["generated_model"] = (df, model)
+        df = model
         st.write("### Generated Financial Model:")
         st.dataframe(df)
 
@@ -142,9 +207,6 @@ elif page == "Generate Model":
             df.to_csv("financial_model.csv", index=False)
             st.success("Financial Model Saved!")
 
-    except:
-        st.warning("No financial data found. Please enter data first.")
-
 # Export Data Page
 elif page == "Export Data":
     st.title("Export Financial Data")
@@ -153,6 +215,7 @@ elif page == "Export Data":
         with open("financial_model.csv", "rb") as f:
             st.download_button("Download Financial Model", f, file_name="financial_model.csv", mime="text/csv")
 
-    if os.path.exists("financial_data.csv"):
-        with open("financial_data.csv", "rb") as f:
-            st.download_button("Download Raw Financial Data", f, file_name="financial_data.csv", mime="text/csv")
+    raw_data = model_store.latest("v4")
+    if not raw_data.empty:
+        st.download_button("Download Raw Financial Data", raw_data.to_csv(index=False).encode(),
+                           file_name="financial_data.csv", mime="text/csv")
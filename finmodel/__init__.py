@@ -0,0 +1,100 @@
+"""Shared data access and valuation code for the financial model apps.
+
+Names are resolved lazily: ``import finmodel`` loads nothing heavy, and
+numpy, pandas, yfinance or pdfplumber are imported only when the first
+name that needs them is used. ``python -m finmodel.importtime`` reports
+the cold-start cost of each dependency.
+"""
+
+import importlib
+
+# Public name -> submodule that defines it
+_EXPORTS = {
+    "RateLimiter": "batch",
+    "run_concurrently": "batch",
+    "CacheMiss": "cache",
+    "StatementCache": "cache",
+    "SCENARIOS": "dcf",
+    "SensitivitySurface": "dcf",
+    "dcf_values": "dcf",
+    "discount_factors": "dcf",
+    "growth_factors": "dcf",
+    "implied_growth": "dcf",
+    "operating_cash_flow": "dcf",
+    "scenario_valuations": "dcf",
+    "PageCache": "documents",
+    "extract_text_from_pdf": "documents",
+    "file_hash": "documents",
+    "iter_pdf_pages": "documents",
+    "iter_pdf_text": "documents",
+    "ARCHIVE_FORMATS": "export",
+    "ConsolidatedExport": "export",
+    "write_archive": "export",
+    "read_excel_or_csv": "documents",
+    "ExtractionStore": "extractstore",
+    "Metric": "metrics",
+    "MetricGraph": "metrics",
+    "V4_GRAPH": "metrics",
+    "V4_METRICS": "metrics",
+    "KEY_COLUMNS": "modelstore",
+    "ModelStore": "modelstore",
+    "MonteCarloResult": "montecarlo",
+    "simulate_dcf": "montecarlo",
+    "CompanyPanel": "panel",
+    "MARGINS": "panel",
+    "annual_totals": "panel",
+    "growth_rates": "panel",
+    "rolling_sum": "panel",
+    "build_balance_sheet": "quarterly",
+    "FLOW_METRICS": "quarterly",
+    "MODEL_SCHEMA": "quarterly",
+    "QuarterlyModel": "quarterly",
+    "TTM_QUARTERS": "quarterly",
+    "build_cash_flow_model": "quarterly",
+    "build_financial_model": "quarterly",
+    "build_income_statement": "quarterly",
+    "build_operational_model": "quarterly",
+    "extract_line_items": "quarterly",
+    "get_quarters": "quarterly",
+    "index_line_items": "quarterly",
+    "model_workbook": "quarterly",
+    "read_financial_sheet": "quarterly",
+    "read_quarter_sheets": "quarterly",
+    "valuation_model": "quarterly",
+    "V4_FIELDS": "pdftables",
+    "extract_statement_fields": "pdftables",
+    "index_statement_pages": "pdftables",
+    "map_rows": "pdftables",
+    "statement_scores": "pdftables",
+    "StageCache": "pipeline",
+    "ValuationPipeline": "pipeline",
+    "input_hash": "pipeline",
+    "STATEMENT_LINES": "projection",
+    "Projection": "projection",
+    "project_statements": "projection",
+    "RATIO_NAMES": "ratios",
+    "key_ratios": "ratios",
+    "XLSX_MIME": "report",
+    "report_bytes": "report",
+    "sheet_name": "report",
+    "write_report": "report",
+    "write_workbook": "report",
+    "TickerSnapshot": "snapshot",
+    "fetch_snapshot": "snapshot",
+    "load_local_snapshot": "snapshot",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted([*globals(), *_EXPORTS])
@@ -0,0 +1,51 @@
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+
+class RateLimiter:
+    """Spaces out requests so no single host sees more than ``rate`` per second."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self._lock = threading.Lock()
+        self._next_slot = {}
+
+    def wait(self, host):
+        """Blocks until the caller may send its next request to ``host``."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def run_concurrently(items, func, max_workers=8, processes=False):
+    """Runs ``func`` over ``items`` on a bounded thread pool, or process pool with ``processes``.
+
+    Yields ``(item, result, error)`` in completion order. An exception raised
+    for one item is returned as its ``error`` and never cancels the others.
+    At most ``2 * max_workers`` items are in flight, so results are released
+    as soon as the caller consumes them, however many items there are.
+    With ``processes``, ``func`` and ``items`` must be picklable.
+    """
+    items = iter(items)
+    executor = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    with executor(max_workers=max_workers) as pool:
+        pending = {}
+
+        def submit_next():
+            for item in items:
+                pending[pool.submit(func, item)] = item
+                return
+
+        for _ in range(2 * max_workers):
+            submit_next()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = pending.pop(future)
+                submit_next()
+                error = future.exception()
+                yield item, None if error else future.result(), error
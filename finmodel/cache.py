@@ -0,0 +1,103 @@
+import os
+import pickle
+import sqlite3
+import time
+from contextlib import closing
+from datetime import date
+
+DEFAULT_PATH = os.environ.get(
+    "FINMODEL_CACHE_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "finmodel", "statements.sqlite"),
+)
+DEFAULT_TTL = float(os.environ.get("FINMODEL_CACHE_TTL_HOURS", "24")) * 3600
+DEFAULT_MAX_BYTES = int(os.environ.get("FINMODEL_CACHE_MAX_MB", "512")) * 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS statements (
+    ticker TEXT NOT NULL,
+    statement TEXT NOT NULL,
+    fetch_date TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    size INTEGER NOT NULL,
+    payload BLOB NOT NULL,
+    PRIMARY KEY (ticker, statement, fetch_date)
+);
+CREATE INDEX IF NOT EXISTS statements_accessed ON statements (accessed_at);
+"""
+
+
+class CacheMiss(LookupError):
+    """Raised in offline mode when a statement is not in the cache."""
+
+
+class StatementCache:
+    """SQLite cache of fetched statements keyed by (ticker, statement, fetch date).
+
+    Entries older than ``ttl`` seconds are treated as misses unless the cache
+    is ``offline``, in which case any cached copy is served and nothing is
+    fetched. Once the stored payloads exceed ``max_bytes`` the least recently
+    read entries are evicted.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES, offline=False):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.offline = offline
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, ticker, statement):
+        """Returns the newest cached copy of a statement, or None on a miss."""
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute(
+                "SELECT fetch_date, fetched_at, payload FROM statements "
+                "WHERE ticker = ? AND statement = ? ORDER BY fetched_at DESC LIMIT 1",
+                (ticker, statement),
+            ).fetchone()
+            if row is None:
+                return None
+            fetch_date, fetched_at, payload = row
+            if not self.offline and time.time() - fetched_at > self.ttl:
+                return None
+            conn.execute(
+                "UPDATE statements SET accessed_at = ? WHERE ticker = ? AND statement = ? AND fetch_date = ?",
+                (time.time(), ticker, statement, fetch_date),
+            )
+        return pickle.loads(payload)
+
+    def put(self, ticker, statement, value):
+        """Stores a statement under today's fetch date and evicts down to ``max_bytes``."""
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO statements VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (ticker, statement, date.today().isoformat(), now, now, len(payload), sqlite3.Binary(payload)),
+            )
+            self._evict(conn)
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM statements").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = conn.execute("SELECT rowid, size FROM statements ORDER BY accessed_at").fetchall()
+        doomed = []
+        for rowid, size in rows:
+            if total <= self.max_bytes:
+                break
+            doomed.append((rowid,))
+            total -= size
+        conn.executemany("DELETE FROM statements WHERE rowid = ?", doomed)
+
+    def clear(self):
+        """Removes every cached statement."""
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM statements")
@@ -0,0 +1,156 @@
+"""Headless batch valuation over a ticker universe.
+
+    python -m finmodel tickers.txt --output valuations.parquet --workers 8
+
+Fetching runs on a process pool, rate-limited to ``--rate`` requests per
+second across all workers, and every finished ticker is appended to
+``<output>.checkpoint.csv``; rerunning the same command skips tickers that
+already succeeded. Valuation and implied growth are then computed for the
+whole universe in one array pass and written to ``--output`` (Parquet or
+CSV by extension).
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from .batch import RateLimiter
+from .cache import StatementCache
+from .dcf import SCENARIOS, dcf_values, implied_growth, operating_cash_flow
+from .ratios import RATIO_NAMES, key_ratios
+from .snapshot import fetch_snapshot, load_local_snapshot
+
+CHECKPOINT_FIELDS = ["Ticker", "Base Cash Flow", *RATIO_NAMES, "Error"]
+
+# Each worker process's share of the request rate, set by _init_worker
+_limiter = None
+
+
+def read_tickers(path):
+    """Reads tickers from a file, one or more per line, ignoring blanks and # comments."""
+    tickers = []
+    with open(path) as f:
+        for line in f:
+            line = line.split("#", 1)[0]
+            tickers.extend(t.strip().upper() for t in line.replace(",", " ").split() if t.strip())
+    return list(dict.fromkeys(tickers))
+
+
+def _init_worker(rate):
+    global _limiter
+    _limiter = RateLimiter(rate)
+
+
+def fetch_row(ticker, data_dir=None, offline=False, limiter=None):
+    """Fetches one ticker's base cash flow and ratios as a checkpoint row; errors become the row's Error.
+
+    Network fetches wait on ``limiter``, defaulting to the worker process's own.
+    """
+    try:
+        if data_dir:
+            snapshot = load_local_snapshot(ticker, data_dir)
+        else:
+            snapshot = fetch_snapshot(ticker, StatementCache(offline=offline), limiter or _limiter)
+        return {"Ticker": ticker, "Base Cash Flow": operating_cash_flow(snapshot), **key_ratios(snapshot.info),
+                "Error": ""}
+    except Exception as e:
+        return {"Ticker": ticker, "Error": f"{type(e).__name__}: {e}"}
+
+
+def read_checkpoint(path):
+    """Returns the rows already fetched by earlier runs, keyed by ticker."""
+    if not os.path.exists(path):
+        return {}
+    checkpoint = pd.read_csv(path, dtype={"Ticker": str}, keep_default_na=False, na_values=[""])
+    checkpoint["Error"] = checkpoint["Error"].fillna("")
+    # Later rows win, so a ticker that failed and then succeeded counts as done
+    return {row["Ticker"]: row for row in checkpoint.to_dict("records")}
+
+
+def value_table(rows, discount_rate, terminal_growth, years):
+    """Values every successfully fetched row in one array pass."""
+    table = pd.DataFrame(rows, columns=CHECKPOINT_FIELDS).set_index("Ticker")
+    ok = table["Error"] == ""
+    base = pd.to_numeric(table["Base Cash Flow"], errors="coerce").to_numpy(dtype=float)
+    market_caps = pd.to_numeric(table["Market Cap"], errors="coerce").to_numpy(dtype=float)
+
+    values = dcf_values(base[:, None], list(SCENARIOS.values()), discount_rate, terminal_growth, years)
+    values[~ok.to_numpy()] = np.nan
+    for scenario, column in zip(SCENARIOS, values.T):
+        table[scenario] = column
+    table["Implied Growth"] = implied_growth(base, market_caps, discount_rate, terminal_growth, years)
+    return table[["Base Cash Flow", *SCENARIOS, "Implied Growth", *RATIO_NAMES, "Error"]]
+
+
+def write_table(table, path):
+    if path.endswith(".parquet"):
+        table.to_parquet(path)
+    else:
+        table.to_csv(path)
+
+
+def run(tickers, output, workers=4, discount_rate=0.10, terminal_growth=0.01, years=5, data_dir=None,
+        offline=False, rate=5, log=sys.stderr):
+    """Fetches, values and writes the whole universe, resuming from the checkpoint if present.
+
+    Each of the ``workers`` processes gets an equal share of ``rate`` requests per second.
+    """
+    started = time.perf_counter()
+    checkpoint_path = f"{output}.checkpoint.csv"
+    done = read_checkpoint(checkpoint_path)
+    pending = [t for t in tickers if t not in done or done[t]["Error"]]
+    print(f"{len(tickers) - len(pending)} tickers already checkpointed, {len(pending)} to fetch", file=log)
+
+    new_file = not os.path.exists(checkpoint_path)
+    with open(checkpoint_path, "a", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=CHECKPOINT_FIELDS)
+        if new_file:
+            writer.writeheader()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(rate / workers,)) as pool:
+            fetch = partial(fetch_row, data_dir=data_dir, offline=offline)
+            futures = [pool.submit(fetch, ticker) for ticker in pending]
+            for count, future in enumerate(as_completed(futures), 1):
+                row = future.result()
+                writer.writerow(row)
+                f.flush()
+                done[row["Ticker"]] = row
+                if row["Error"]:
+                    print(f"[{count}/{len(pending)}] {row['Ticker']}: {row['Error']}", file=log)
+
+    table = value_table([done[t] for t in tickers], discount_rate, terminal_growth, years)
+    write_table(table, output)
+    os.remove(checkpoint_path)
+
+    failed = int((table["Error"] != "").sum())
+    print(f"Valued {len(table) - failed} tickers ({failed} failed) in {time.perf_counter() - started:.1f}s "
+          f"-> {output}", file=log)
+    return table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m finmodel", description="Batch DCF valuation of a ticker universe.")
+    parser.add_argument("tickers", help="file with tickers, one or more per line")
+    parser.add_argument("-o", "--output", default="valuations.csv", help="output table (.parquet or .csv)")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1, help="fetch processes")
+    parser.add_argument("--discount-rate", type=float, default=0.10)
+    parser.add_argument("--terminal-growth", type=float, default=0.01)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--rate", type=float, default=5, help="Yahoo Finance requests per second, all workers")
+    parser.add_argument("--offline", action="store_true", help="serve statements from the cache only")
+    parser.add_argument("--data-dir", help="read statements from <dir>/<TICKER>/ instead of Yahoo Finance")
+    args = parser.parse_args(argv)
+
+    run(read_tickers(args.tickers), args.output, workers=args.workers, discount_rate=args.discount_rate,
+        terminal_growth=args.terminal_growth, years=args.years, data_dir=args.data_dir, offline=args.offline,
+        rate=args.rate)
+
+
+if __name__ == "__main__":
+    main()
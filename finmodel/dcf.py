@@ -0,0 +1,151 @@
+import numpy as np
+
+# Growth assumptions behind the multi-scenario valuations
+BASE_GROWTH = 0.05
+SCENARIOS = {
+    "Base Case": BASE_GROWTH,
+    "Optimistic Case": BASE_GROWTH + 0.03,
+    "Pessimistic Case": BASE_GROWTH - 0.02,
+}
+
+OPERATING_CASH_FLOW = "Total Cash From Operating Activities"
+
+
+def operating_cash_flow(snapshot):
+    """Returns the most recent operating cash flow from a TickerSnapshot."""
+    return snapshot.cash_flow.loc[OPERATING_CASH_FLOW].iloc[0]
+
+
+def discount_factors(discount_rates, horizon):
+    """Table of 1 / (1 + r) ** t for t = 1..horizon, with shape rates.shape + (horizon,)."""
+    periods = np.arange(1, horizon + 1)
+    return (1.0 + np.asarray(discount_rates, dtype=float)[..., None]) ** -periods
+
+
+def growth_factors(growth_rates, horizon):
+    """Table of (1 + g) ** t for t = 1..horizon, with shape rates.shape + (horizon,)."""
+    periods = np.arange(1, horizon + 1)
+    return (1.0 + np.asarray(growth_rates, dtype=float)[..., None]) ** periods
+
+
+def dcf_values(base_cash_flows, growth_rates, discount_rates, terminal_growth_rates=0.0, horizons=5,
+               include_terminal=True):
+    """Values every combination of the inputs in one broadcast pass.
+
+    All arguments broadcast against each other, so e.g. cash flows of shape
+    ``(tickers, 1)`` and growth rates of shape ``(scenarios,)`` give a
+    ``(tickers, scenarios)`` result. Cash flows grow at ``growth_rates`` for
+    ``horizons`` years and are discounted at ``discount_rates``; a Gordon
+    growth terminal value is added at the horizon unless ``include_terminal``
+    is False.
+    """
+    cf, g, r, tg, n = np.broadcast_arrays(
+        *(np.asarray(a, dtype=float) for a in (base_cash_flows, growth_rates, discount_rates,
+                                              terminal_growth_rates, horizons)))
+    n = n.astype(int)
+    horizon = int(n.max()) if n.size else 0
+    growth = growth_factors(g, horizon)
+    discount = discount_factors(r, horizon)
+
+    # Present value accumulated through each year; pick out each entry's own horizon
+    last = (n - 1)[..., None]
+    present = np.cumsum(growth * discount, axis=-1)
+    value = cf * np.take_along_axis(present, last, axis=-1)[..., 0]
+
+    if include_terminal:
+        final_growth = np.take_along_axis(growth, last, axis=-1)[..., 0]
+        final_discount = np.take_along_axis(discount, last, axis=-1)[..., 0]
+        value = value + cf * final_growth * (1 + tg) / (r - tg) * final_discount
+    return value
+
+
+def scenario_valuations(base_cash_flow, discount_rate, terminal_growth, years, scenarios=SCENARIOS):
+    """Values each named growth scenario and returns {scenario: DCF value}."""
+    values = dcf_values(base_cash_flow, list(scenarios.values()), discount_rate, terminal_growth, years)
+    return dict(zip(scenarios, values.tolist()))
+
+
+class SensitivitySurface:
+    """DCF values precomputed over every discount rate x terminal growth x horizon x scenario.
+
+    Built in one ``dcf_values`` call so that moving a parameter afterwards is
+    an index lookup rather than a revaluation. Given a ``market_value``, the
+    market-implied growth rate is solved for every grid point as well.
+    """
+
+    def __init__(self, base_cash_flow, discount_rates, terminal_growth_rates, horizons, scenarios=SCENARIOS,
+                 market_value=None):
+        self.discount_rates = np.asarray(discount_rates, dtype=float)
+        self.terminal_growth_rates = np.asarray(terminal_growth_rates, dtype=float)
+        self.horizons = np.asarray(horizons, dtype=int)
+        self.scenarios = list(scenarios)
+        growth = np.asarray(list(scenarios.values()), dtype=float)
+        # Axes: discount rate, terminal growth, horizon, scenario
+        self.values = dcf_values(base_cash_flow,
+                                 growth[None, None, None, :],
+                                 self.discount_rates[:, None, None, None],
+                                 self.terminal_growth_rates[None, :, None, None],
+                                 self.horizons[None, None, :, None])
+        self.implied_growth = None
+        if market_value is not None:
+            self.implied_growth = implied_growth(base_cash_flow, market_value,
+                                                 self.discount_rates[:, None, None],
+                                                 self.terminal_growth_rates[None, :, None],
+                                                 self.horizons[None, None, :])
+
+    @staticmethod
+    def _index(grid, value):
+        i = int(np.abs(grid - value).argmin())
+        if not np.isclose(grid[i], value):
+            raise KeyError(f"{value} is not on the precomputed grid")
+        return i
+
+    def lookup(self, discount_rate, terminal_growth, years):
+        """Returns {scenario: DCF value} for one point on the grid."""
+        values = self.values[self._index(self.discount_rates, discount_rate),
+                             self._index(self.terminal_growth_rates, terminal_growth),
+                             self._index(self.horizons, years)]
+        return dict(zip(self.scenarios, values.tolist()))
+
+    def lookup_implied_growth(self, discount_rate, terminal_growth, years):
+        """Returns the market-implied growth rate at one grid point, or None without a market value."""
+        if self.implied_growth is None:
+            return None
+        return float(self.implied_growth[self._index(self.discount_rates, discount_rate),
+                                         self._index(self.terminal_growth_rates, terminal_growth),
+                                         self._index(self.horizons, years)])
+
+    def grid(self, years, scenario):
+        """Returns the discount rate x terminal growth slice for one horizon and scenario."""
+        import pandas as pd
+
+        return pd.DataFrame(self.values[:, :, self._index(self.horizons, years), self.scenarios.index(scenario)],
+                            index=pd.Index(self.discount_rates, name="Discount Rate"),
+                            columns=pd.Index(self.terminal_growth_rates, name="Terminal Growth"))
+
+
+def implied_growth(base_cash_flows, market_values, discount_rates, terminal_growth_rates=0.0, horizons=5,
+                   low=-0.5, high=1.0, tol=1e-7, max_iter=100):
+    """Solves for the growth rate at which the DCF value equals each market value.
+
+    Runs a bisection on all entries at once, one ``dcf_values`` call per
+    iteration, since value rises with growth whenever the base cash flow is
+    positive. Entries with a non-positive cash flow, a missing market value
+    or no root inside ``[low, high]`` come back as NaN.
+    """
+    cf, target, r, tg, n = np.broadcast_arrays(
+        *(np.asarray(a, dtype=float) for a in (base_cash_flows, market_values, discount_rates,
+                                              terminal_growth_rates, horizons)))
+    lo = np.full(cf.shape, low)
+    hi = np.full(cf.shape, high)
+    solvable = ((cf > 0) & np.isfinite(target)
+                & (dcf_values(cf, lo, r, tg, n) <= target) & (dcf_values(cf, hi, r, tg, n) >= target))
+
+    for _ in range(max_iter):
+        mid = (lo + hi) / 2
+        too_low = dcf_values(cf, mid, r, tg, n) < target
+        lo = np.where(too_low, mid, lo)
+        hi = np.where(too_low, hi, mid)
+        if np.all(hi - lo < tol):
+            break
+    return np.where(solvable, (lo + hi) / 2, np.nan)
@@ -0,0 +1,212 @@
+import hashlib
+import os
+import sqlite3
+import tempfile
+import time
+from contextlib import closing
+
+from .batch import run_concurrently
+
+DEFAULT_PAGE_CACHE_PATH = os.environ.get(
+    "FINMODEL_PAGE_CACHE_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "finmodel", "pages.sqlite"),
+)
+DEFAULT_PAGE_CACHE_MAX_BYTES = int(os.environ.get("FINMODEL_PAGE_CACHE_MAX_MB", "256")) * 1024 * 1024
+
+# Pages handed to a worker per task; each task opens the PDF once
+PAGES_PER_TASK = 8
+
+PAGE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    file_hash TEXT PRIMARY KEY,
+    page_count INTEGER NOT NULL,
+    extracted_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS documents_accessed ON documents (accessed_at);
+CREATE TABLE IF NOT EXISTS pages (
+    file_hash TEXT NOT NULL,
+    page INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (file_hash, page)
+);
+"""
+
+
+def file_hash(data):
+    """Returns the sha256 hex digest identifying an uploaded file's bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+class PageCache:
+    """SQLite cache of extracted PDF page text keyed by (file hash, page number).
+
+    Once the stored text exceeds ``max_bytes`` the least recently read
+    documents are evicted, all of their pages at once.
+    """
+
+    def __init__(self, path=DEFAULT_PAGE_CACHE_PATH, max_bytes=DEFAULT_PAGE_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(PAGE_SCHEMA)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def page_count(self, digest):
+        """Returns the page count recorded for a file, or None if it was never opened."""
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT page_count FROM documents WHERE file_hash = ?", (digest,)).fetchone()
+        return row[0] if row else None
+
+    def get(self, digest):
+        """Returns {page number: text} for every cached page of a file."""
+        with closing(self._connect()) as conn, conn:
+            conn.execute("UPDATE documents SET accessed_at = ? WHERE file_hash = ?", (time.time(), digest))
+            return dict(conn.execute("SELECT page, text FROM pages WHERE file_hash = ?", (digest,)))
+
+    def put(self, digest, page_count, pages):
+        """Stores a file's page count and any newly extracted (page number, text) pairs.
+
+        Then evicts other documents down to ``max_bytes``.
+        """
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.executemany("INSERT OR REPLACE INTO pages VALUES (?, ?, ?)",
+                             [(digest, page, text) for page, text in pages])
+            size = conn.execute("SELECT COALESCE(SUM(LENGTH(CAST(text AS BLOB))), 0) FROM pages WHERE file_hash = ?",
+                                (digest,)).fetchone()[0]
+            conn.execute(
+                "INSERT INTO documents VALUES (?, ?, ?, ?, ?) ON CONFLICT (file_hash) DO UPDATE SET "
+                "page_count = excluded.page_count, accessed_at = excluded.accessed_at, size = excluded.size",
+                (digest, page_count, now, now, size),
+            )
+            self._evict(conn, digest)
+
+    def _evict(self, conn, keep):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM documents").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # The document being written is never evicted, so a file larger than the budget still caches whole
+        rows = conn.execute("SELECT file_hash, size FROM documents WHERE file_hash != ? ORDER BY accessed_at",
+                            (keep,)).fetchall()
+        doomed = []
+        for digest, size in rows:
+            if total <= self.max_bytes:
+                break
+            doomed.append((digest,))
+            total -= size
+        conn.executemany("DELETE FROM pages WHERE file_hash = ?", doomed)
+        conn.executemany("DELETE FROM documents WHERE file_hash = ?", doomed)
+
+    def clear(self):
+        """Removes every cached page."""
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM pages")
+            conn.execute("DELETE FROM documents")
+
+
+def _count_pages(path):
+    import pdfplumber
+
+    with pdfplumber.open(path) as pdf:
+        return len(pdf.pages)
+
+
+def _extract_pages(task):
+    """Extracts a run of pages from the PDF at ``path``, calling extract_text once per page."""
+    import pdfplumber
+
+    path, page_numbers = task
+    with pdfplumber.open(path, pages=[number + 1 for number in page_numbers]) as pdf:
+        return [(number, page.extract_text() or "") for number, page in zip(page_numbers, pdf.pages)]
+
+
+def iter_pdf_pages(data, cache=None, max_workers=None, progress=None):
+    """Yields ``(page number, text)`` for a PDF's bytes as pages become available.
+
+    Cached pages come first; the rest are extracted in runs of
+    ``PAGES_PER_TASK`` on a process pool and yielded in completion order,
+    so callers needing document order should sort by page number. Each page
+    is extracted once and ``progress(done, total)`` is called as pages arrive.
+    """
+    digest = file_hash(data)
+    cached = cache.get(digest) if cache is not None else {}
+    page_count = cache.page_count(digest) if cache is not None else None
+
+    done = 0
+    for number, text in sorted(cached.items()):
+        done += 1
+        yield number, text
+    if page_count is not None and done >= page_count:
+        if progress is not None:
+            progress(done, page_count)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "document.pdf")
+        with open(path, "wb") as f:
+            f.write(data)
+        if page_count is None:
+            page_count = _count_pages(path)
+        if progress is not None:
+            progress(done, page_count)
+
+        missing = [number for number in range(page_count) if number not in cached]
+        tasks = [(path, missing[i:i + PAGES_PER_TASK]) for i in range(0, len(missing), PAGES_PER_TASK)]
+        workers = min(max_workers or os.cpu_count() or 1, len(tasks)) or 1
+        for _, pages, error in run_concurrently(tasks, _extract_pages, workers, processes=workers > 1):
+            if error is not None:
+                raise error
+            if cache is not None:
+                cache.put(digest, page_count, pages)
+            for number, text in pages:
+                yield number, text
+            done += len(pages)
+            if progress is not None:
+                progress(done, page_count)
+        if cache is not None and not missing:
+            cache.put(digest, page_count, [])
+
+
+def iter_pdf_text(data, cache=None, max_workers=None, progress=None):
+    """Yields a PDF's text in document order, one newline-joined piece per non-empty page.
+
+    Pages arriving ahead of their turn from ``iter_pdf_pages`` are held only
+    until the pages before them have been yielded.
+    """
+    waiting, next_page, separator = {}, 0, ""
+    for number, text in iter_pdf_pages(data, cache, max_workers, progress):
+        waiting[number] = text
+        while next_page in waiting:
+            text = waiting.pop(next_page)
+            next_page += 1
+            if text:
+                yield separator + text
+                separator = "\n"
+
+
+def extract_text_from_pdf(uploaded_files, cache=None, max_workers=None, progress=None):
+    """Extracts the text of every page of each PDF, one string per file.
+
+    Holds each whole document in memory; ``iter_pdf_text`` streams it instead.
+    """
+    return ["".join(iter_pdf_text(uploaded_file.getvalue(), cache, max_workers, progress))
+            for uploaded_file in uploaded_files]
+
+
+def read_excel_or_csv(uploaded_file):
+    """Reads an uploaded .csv or .xlsx file into a DataFrame, or returns None for other types."""
+    import pandas as pd
+
+    if uploaded_file.name.endswith(".csv"):
+        return pd.read_csv(uploaded_file)
+    elif uploaded_file.name.endswith(".xlsx"):
+        return pd.read_excel(uploaded_file, engine="openpyxl")
+    else:
+        return None
@@ -0,0 +1,139 @@
+import os
+import zipfile
+
+from .report import STATEMENT_SHEETS, _cell, write_workbook
+
+STATEMENT_COLUMNS = ["Ticker", "Line Item", "Period", "Value"]
+
+# Buffered Parquet rows are flushed as a row group once this many accumulate
+PARQUET_ROW_GROUP = 50_000
+
+
+# Member file types write_archive can produce
+ARCHIVE_FORMATS = ("xlsx", "parquet")
+
+
+def write_archive(target, frames, file_format="xlsx"):
+    """Writes each {name: DataFrame} as its own .xlsx or .parquet member of a ZIP archive at ``target``.
+
+    Members are written and compressed one at a time, so only one company's
+    file is ever being built.
+    """
+    if file_format not in ARCHIVE_FORMATS:
+        raise ValueError(f"Unsupported archive format {file_format!r}; expected one of {ARCHIVE_FORMATS}")
+    with zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, df in frames.items():
+            with archive.open(f"{os.path.splitext(name)[0]}.{file_format}", "w") as member:
+                if file_format == "xlsx":
+                    write_workbook(member, {"Financial Model": df})
+                else:
+                    df.to_parquet(member)
+    return target
+
+
+class _ParquetStream:
+    """Appends rows to a Parquet file in bounded row groups."""
+
+    def __init__(self, target, schema):
+        import pyarrow.parquet as pq
+
+        self.schema = schema
+        self.writer = pq.ParquetWriter(target, schema)
+        self.buffer = {name: [] for name in schema.names}
+        self.pending = 0
+
+    def append(self, row):
+        for name, value in zip(self.schema.names, row):
+            self.buffer[name].append(value)
+        self.pending += 1
+        if self.pending >= PARQUET_ROW_GROUP:
+            self.flush()
+
+    def flush(self):
+        import pyarrow as pa
+
+        if self.pending:
+            self.writer.write_table(pa.Table.from_pydict(self.buffer, schema=self.schema))
+            self.buffer = {name: [] for name in self.schema.names}
+            self.pending = 0
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class ConsolidatedExport:
+    """Streams many tickers' statements, valuations and ratios into one workbook.
+
+    Each ``add`` writes its rows straight through xlsxwriter's constant-memory
+    mode, so memory stays flat however many tickers are exported. Statements
+    go to one long-format sheet each (Ticker, Line Item, Period, Value) and
+    ``valuation_columns`` to a single Valuations sheet with one row per
+    ticker. Given ``statements_parquet`` and ``valuations_parquet`` targets,
+    the same rows are streamed to Parquet as well.
+    """
+
+    def __init__(self, target, valuation_columns, statements_parquet=None, valuations_parquet=None):
+        import xlsxwriter
+
+        self.valuation_columns = list(valuation_columns)
+        self.workbook = xlsxwriter.Workbook(target, {"constant_memory": True})
+        self.sheets = {name: self.workbook.add_worksheet(name) for name in STATEMENT_SHEETS}
+        self.sheets["Valuations"] = self.workbook.add_worksheet("Valuations")
+        self.next_row = {name: 1 for name in self.sheets}
+        for name, sheet in self.sheets.items():
+            sheet.write_row(0, 0, ["Ticker", *self.valuation_columns] if name == "Valuations" else STATEMENT_COLUMNS)
+
+        self.statements_parquet = self.valuations_parquet = None
+        if statements_parquet is not None or valuations_parquet is not None:
+            import pyarrow as pa
+
+            if statements_parquet is not None:
+                self.statements_parquet = _ParquetStream(statements_parquet, pa.schema(
+                    [("statement", pa.string()), ("ticker", pa.string()), ("line_item", pa.string()),
+                     ("period", pa.string()), ("value", pa.float64())]))
+            if valuations_parquet is not None:
+                self.valuations_parquet = _ParquetStream(valuations_parquet, pa.schema(
+                    [("ticker", pa.string()), *((column, pa.float64()) for column in self.valuation_columns)]))
+
+    def _write(self, name, values):
+        self.sheets[name].write_row(self.next_row[name], 0, values)
+        self.next_row[name] += 1
+
+    def add(self, snapshot, valuation_row):
+        """Writes one ticker's statements and its {column: value} valuation row."""
+        ticker = snapshot.ticker
+        for name, field in STATEMENT_SHEETS.items():
+            statement = getattr(snapshot, field)
+            periods = [_cell(period) for period in statement.columns]
+            for line_item, values in zip(statement.index, statement.itertuples(index=False, name=None)):
+                line_item = _cell(line_item)
+                for period, value in zip(periods, values):
+                    value = _cell(value)
+                    self._write(name, [ticker, line_item, period, value])
+                    if self.statements_parquet is not None:
+                        self.statements_parquet.append([name, ticker, str(line_item), str(period), _float(value)])
+
+        values = [_cell(valuation_row.get(column)) for column in self.valuation_columns]
+        self._write("Valuations", [ticker, *values])
+        if self.valuations_parquet is not None:
+            self.valuations_parquet.append([ticker, *map(_float, values)])
+
+    def close(self):
+        self.workbook.close()
+        for stream in (self.statements_parquet, self.valuations_parquet):
+            if stream is not None:
+                stream.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,172 @@
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from itertools import islice
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+DEFAULT_ROOT = os.environ.get("FINMODEL_EXTRACT_DIR", "extracted_data")
+
+# Characters per stored text chunk; chunks are Parquet rows, compressed together
+TEXT_CHUNK_CHARS = 64 * 1024
+
+# Chunks buffered before they are written out as one Parquet row group
+CHUNKS_PER_ROW_GROUP = 16
+
+
+def _arrow_table(df):
+    """Converts an uploaded DataFrame to Arrow, stringifying columns Arrow cannot type."""
+    import pyarrow as pa
+
+    df = df.rename(columns=str)
+    columns = {}
+    for name in df.columns:
+        try:
+            columns[name] = pa.array(df[name], from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            columns[name] = pa.array(df[name].astype(str), from_pandas=True)
+    return pa.table(columns)
+
+
+@contextmanager
+def _locked(path):
+    """Holds an exclusive lock on the file at ``path``, creating it, across threads and processes."""
+    with open(path, "a+") as f:
+        f.seek(0)
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def _replacing(path):
+    """Yields a unique temporary path beside ``path`` and moves it over ``path`` if the block succeeds."""
+    handle, temporary = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    os.close(handle)
+    try:
+        yield temporary
+        os.replace(temporary, path)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+
+
+def _text_chunks(pieces):
+    """Regroups streamed text pieces into ``TEXT_CHUNK_CHARS`` chunks, holding at most one chunk's remainder."""
+    pending = ""
+    for piece in pieces:
+        pending += piece
+        start = 0
+        while len(pending) - start >= TEXT_CHUNK_CHARS:
+            yield pending[start:start + TEXT_CHUNK_CHARS]
+            start += TEXT_CHUNK_CHARS
+        pending = pending[start:]
+    if pending:
+        yield pending
+
+
+class ExtractionStore:
+    """Saved upload extractions: Parquet tables, zstd-compressed text chunks and a JSON manifest.
+
+    Each extraction is keyed by the sha256 of its source file. Saving only
+    writes files for hashes not already stored and then swaps in the updated
+    manifest, and reloads memory-map the Parquet files instead of parsing the
+    original uploads again. Every file is written to a unique temporary name
+    and renamed into place, and manifest updates hold a lock file, so
+    sessions can save concurrently.
+    """
+
+    def __init__(self, root=DEFAULT_ROOT):
+        self.root = root
+        for folder in ("tables", "text"):
+            os.makedirs(os.path.join(root, folder), exist_ok=True)
+        self.manifest_path = os.path.join(root, "manifest.json")
+        self.lock_path = os.path.join(root, "manifest.lock")
+
+    def manifest(self):
+        """Returns {file hash: entry} for every stored extraction; a missing or unreadable manifest is empty."""
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _record(self, digest, entry):
+        with _locked(self.lock_path):
+            manifest = self.manifest()
+            manifest[digest] = entry
+            with _replacing(self.manifest_path) as temporary:
+                with open(temporary, "w") as f:
+                    json.dump(manifest, f, indent=1)
+
+    def __contains__(self, digest):
+        return digest in self.manifest()
+
+    def _path(self, kind, digest):
+        return os.path.join(self.root, kind, f"{digest}.parquet")
+
+    def add_table(self, digest, name, df):
+        """Stores an extracted table unless its file hash is already present; returns whether it wrote."""
+        import pyarrow.parquet as pq
+
+        if digest in self:
+            return False
+        with _replacing(self._path("tables", digest)) as temporary:
+            pq.write_table(_arrow_table(df), temporary, compression="zstd")
+        self._record(digest, {"name": name, "kind": "table", "rows": len(df), "saved_at": time.time()})
+        return True
+
+    def add_text(self, digest, name, text):
+        """Stores extracted text as compressed chunks unless its file hash is already present.
+
+        ``text`` is a string or an iterable of pieces such as ``iter_pdf_text``;
+        pieces are written a row group at a time as they arrive.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if digest in self:
+            return False
+        chunks = _text_chunks([text] if isinstance(text, str) else text)
+        chunk_count = characters = 0
+        schema = pa.schema([("chunk", pa.large_string())])
+        with _replacing(self._path("text", digest)) as temporary:
+            with pq.ParquetWriter(temporary, schema, compression="zstd") as writer:
+                while True:
+                    batch = list(islice(chunks, CHUNKS_PER_ROW_GROUP))
+                    if not batch:
+                        break
+                    writer.write_table(pa.table({"chunk": pa.array(batch, pa.large_string())}, schema=schema))
+                    chunk_count += len(batch)
+                    characters += sum(map(len, batch))
+        self._record(digest, {"name": name, "kind": "text", "chunks": chunk_count, "characters": characters,
+                              "saved_at": time.time()})
+        return True
+
+    def load_table(self, digest):
+        """Reloads a stored table through a memory map."""
+        import pyarrow.parquet as pq
+
+        return pq.read_table(self._path("tables", digest), memory_map=True).to_pandas()
+
+    def load_text(self, digest):
+        """Reloads stored text through a memory map."""
+        import pyarrow.parquet as pq
+
+        return "".join(pq.read_table(self._path("text", digest), memory_map=True).column("chunk").to_pylist())
@@ -0,0 +1,48 @@
+"""Reports the cold-start import cost of the apps' dependencies.
+
+    python -m finmodel.importtime [module ...]
+
+Each module is imported in a fresh interpreter, best of ``--repeat`` runs,
+which is what a new Streamlit server process or batch worker pays.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+DEFAULT_MODULES = [
+    "finmodel", "finmodel.dcf", "finmodel.snapshot", "finmodel.quarterly",
+    "numpy", "pandas", "streamlit", "yfinance", "altair", "xlsxwriter", "openpyxl", "pdfplumber",
+]
+
+# Run from the repo root so ``finmodel`` resolves the way it does for the apps
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_time(module, repeat=3):
+    """Returns the best wall time in seconds to import ``module`` cold, or None if it is not installed."""
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    best = None
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=ROOT)
+        if result.returncode != 0:
+            return None
+        elapsed = float(result.stdout.strip().splitlines()[-1])
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m finmodel.importtime", description=__doc__.splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    for module in args.modules:
+        seconds = import_time(module, args.repeat)
+        print(f"{module:<22} {'not installed' if seconds is None else f'{seconds * 1000:8.1f} ms'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# A derived column: ``func`` receives its ``inputs`` as float64 arrays and returns one array
+Metric = namedtuple("Metric", ["name", "inputs", "func"])
+
+
+def percent_of(numerator, denominator):
+    """``numerator / denominator * 100``, NaN where the denominator is zero or missing."""
+    result = np.full(np.broadcast(numerator, denominator).shape, np.nan)
+    np.divide(numerator * 100, denominator, out=result, where=denominator != 0)
+    return result
+
+
+def per(numerator, denominator):
+    """``numerator / denominator``, NaN where the denominator is zero or missing."""
+    return percent_of(numerator, denominator) / 100
+
+
+V4_METRICS = [
+    Metric("Profit Margin (%)", ("Net Income", "Total Revenue"), percent_of),
+    Metric("Gross Margin (%)", ("Gross Profit", "Total Revenue"), percent_of),
+    Metric("Operating Margin (%)", ("Operating Income", "Total Revenue"), percent_of),
+    Metric("S&M (% of Revenue)", ("Sales & Marketing", "Total Revenue"), percent_of),
+    Metric("R&D (% of Revenue)", ("R&D", "Total Revenue"), percent_of),
+    Metric("G&A (% of Revenue)", ("G&A", "Total Revenue"), percent_of),
+    Metric("OpEx (% of Revenue)", ("OpEx", "Total Revenue"), percent_of),
+    Metric("Effective Tax Rate (%)", ("Taxes", "Pretax Income"), percent_of),
+    Metric("Implied EPS", ("Net Income", "Shares Outstanding"), per),
+    Metric("Growth-Adjusted Revenue",
+           ("Commercial Revenue", "Commercial Revenue Growth y/y (%)",
+            "Government Revenue", "Government Revenue Growth y/y (%)"),
+           lambda commercial, commercial_growth, government, government_growth:
+               commercial * (1 + commercial_growth / 100) + government * (1 + government_growth / 100)),
+    Metric("Growth-Adjusted Net Income", ("Growth-Adjusted Revenue", "Profit Margin (%)"),
+           lambda revenue, margin: revenue * margin / 100),
+]
+
+
+class MetricGraph:
+    """Derived metrics ordered by their dependencies and computed a whole column at a time.
+
+    Metrics may depend on input columns or on other metrics. ``compute``
+    evaluates them in topological order over every row at once, and given
+    the changed input columns it recomputes only the metrics downstream of
+    them.
+    """
+
+    def __init__(self, metrics):
+        self.metrics = {metric.name: metric for metric in metrics}
+        self.order = self._topological_order()
+        self.dependents = {name: set() for name in self.metrics}
+        for metric in self.metrics.values():
+            for column in metric.inputs:
+                self.dependents.setdefault(column, set()).add(metric.name)
+
+    def _topological_order(self):
+        order, state = [], {}
+
+        def visit(name, path):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError(f"Metric dependency cycle: {' -> '.join([*path, name])}")
+            state[name] = "visiting"
+            for column in self.metrics[name].inputs:
+                if column in self.metrics:
+                    visit(column, [*path, name])
+            state[name] = "done"
+            order.append(name)
+
+        for name in self.metrics:
+            visit(name, [])
+        return order
+
+    def downstream(self, columns):
+        """Returns every metric that depends, directly or transitively, on ``columns``."""
+        affected, stack = set(), list(columns)
+        while stack:
+            for name in self.dependents.get(stack.pop(), ()):
+                if name not in affected:
+                    affected.add(name)
+                    stack.append(name)
+        return affected
+
+    def compute(self, df, changed=None, previous=None):
+        """Returns ``df`` with every metric column added.
+
+        With ``changed`` input columns and the ``previous`` result for the same
+        rows, only metrics downstream of ``changed`` are recomputed and the rest
+        are copied from ``previous``. Missing inputs give NaN metrics.
+        """
+        result = df.copy()
+        if changed is not None and previous is not None and previous.index.equals(df.index):
+            targets = self.downstream(changed)
+        else:
+            targets = set(self.metrics)
+
+        nan_column = np.full(len(result), np.nan)
+        for name in self.order:
+            if name not in targets:
+                result[name] = previous[name]
+                continue
+            metric = self.metrics[name]
+            arrays = [pd.to_numeric(result[column], errors="coerce").to_numpy(dtype=float)
+                      if column in result else nan_column for column in metric.inputs]
+            result[name] = metric.func(*arrays)
+        return result
+
+
+V4_GRAPH = MetricGraph(V4_METRICS)
@@ -0,0 +1,97 @@
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+DEFAULT_PATH = os.environ.get("FINMODEL_MODEL_STORE", "financial_data.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    app TEXT NOT NULL,
+    company TEXT NOT NULL,
+    period TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    saved_at REAL NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (app, company, period, version)
+);
+CREATE INDEX IF NOT EXISTS entries_saved ON entries (app, saved_at);
+"""
+
+KEY_COLUMNS = ["Company", "Period", "Version", "Saved At"]
+
+
+class ModelStore:
+    """Append-only SQLite store of entered financial data keyed by (app, company, period, version).
+
+    Every save adds a new version instead of overwriting, and reads pick
+    the latest version per company and period through the primary key
+    index. The database runs in WAL mode so many sessions can save and
+    read at once.
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def save(self, app, company, period, data):
+        """Appends ``data`` as the next version for (app, company, period) and returns that version."""
+        payload = json.dumps(data)
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                version = conn.execute(
+                    "SELECT COALESCE(MAX(version), 0) + 1 FROM entries WHERE app = ? AND company = ? AND period = ?",
+                    (app, company, period),
+                ).fetchone()[0]
+                conn.execute("INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                             (app, company, period, version, time.time(), payload))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return version
+
+    def _frame(self, rows):
+        import pandas as pd
+
+        keys = pd.DataFrame([row[:4] for row in rows], columns=KEY_COLUMNS)
+        keys["Saved At"] = pd.to_datetime(keys["Saved At"], unit="s")
+        values = pd.DataFrame.from_records([json.loads(row[4]) for row in rows])
+        return pd.concat([keys, values], axis=1)
+
+    def latest(self, app, company=None):
+        """Returns the latest version of every (company, period) entry, optionally for one company."""
+        query = """
+            SELECT company, period, version, saved_at, data FROM entries AS e
+            WHERE app = ? AND version = (
+                SELECT MAX(version) FROM entries
+                WHERE app = e.app AND company = e.company AND period = e.period
+            )
+        """
+        params = [app]
+        if company is not None:
+            query += " AND company = ?"
+            params.append(company)
+        with closing(self._connect()) as conn:
+            rows = conn.execute(query + " ORDER BY company, period", params).fetchall()
+        return self._frame(rows)
+
+    def history(self, app, company, period):
+        """Returns every saved version of one (company, period) entry, oldest first."""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT company, period, version, saved_at, data FROM entries "
+                "WHERE app = ? AND company = ? AND period = ? ORDER BY version",
+                (app, company, period),
+            ).fetchall()
+        return self._frame(rows)
@@ -0,0 +1,125 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+from .dcf import dcf_values
+
+# Fine bins used to accumulate the distribution; percentiles are read off these
+ACCUMULATOR_BINS = 4096
+
+
+def sample(spec, rng, size):
+    """Draws ``size`` values from a distribution spec.
+
+    A spec is either a constant or a tuple naming a numpy Generator method
+    followed by its parameters, e.g. ``("normal", 0.05, 0.02)`` or
+    ``("triangular", 0.08, 0.10, 0.13)``.
+    """
+    if np.isscalar(spec):
+        return np.full(size, float(spec))
+    kind, *params = spec
+    return getattr(rng, kind)(*params, size=size)
+
+
+def _simulate_chunk(base_cash_flow, growth, discount_rate, terminal_growth, years, size, seed):
+    rng = np.random.default_rng(seed)
+    g = sample(growth, rng, size)
+    r = sample(discount_rate, rng, size)
+    tg = sample(terminal_growth, rng, size)
+    # A terminal value only exists while the discount rate exceeds terminal growth
+    valid = r > tg
+    return dcf_values(base_cash_flow, g[valid], r[valid], tg[valid], years)
+
+
+def _accumulate_chunk(args):
+    edges, *chunk = args
+    values = _simulate_chunk(*chunk)
+    counts, _ = np.histogram(values, bins=edges)
+    return counts, int((values < edges[0]).sum()), values.size, float(values.sum())
+
+
+@dataclass
+class MonteCarloResult:
+    """Summary of a simulated DCF distribution."""
+    paths: int
+    valid_paths: int
+    mean: float
+    percentiles: dict
+    bin_edges: np.ndarray
+    counts: np.ndarray
+    seconds: float
+
+    @property
+    def paths_per_second(self):
+        return self.paths / self.seconds if self.seconds else float("inf")
+
+    def histogram(self, bins=50):
+        """Returns (counts, edges) merged down to roughly ``bins`` bins for display."""
+        step = max(1, len(self.counts) // bins)
+        usable = len(self.counts) // step * step
+        counts = self.counts[:usable].reshape(-1, step).sum(axis=1)
+        return counts, self.bin_edges[:usable + 1:step]
+
+
+def _percentile(edges, counts, below, total, q):
+    target = q / 100 * total
+    cumulative = below + np.cumsum(counts)
+    i = int(np.searchsorted(cumulative, target))
+    if i >= len(counts):
+        return float(edges[-1])
+    start = cumulative[i] - counts[i]
+    fraction = (target - start) / counts[i] if counts[i] else 0.0
+    return float(edges[i] + min(max(fraction, 0.0), 1.0) * (edges[i + 1] - edges[i]))
+
+
+def simulate_dcf(base_cash_flow, growth, discount_rate, terminal_growth, years, paths,
+                 chunk_size=250_000, seed=None, workers=1, percentiles=(5, 25, 50, 75, 95)):
+    """Runs a Monte Carlo DCF over ``paths`` samples in fixed-size chunks.
+
+    ``growth``, ``discount_rate`` and ``terminal_growth`` are distribution
+    specs (see ``sample``). Only one chunk of values is held in memory at a
+    time: each chunk is folded into a fixed histogram whose range is set from
+    the first chunk, and percentiles are interpolated from it. Every chunk has
+    its own child seed of ``seed``, so results do not depend on ``workers``.
+    Paths where the discount rate does not exceed terminal growth are dropped.
+    """
+    started = time.perf_counter()
+    sizes = [chunk_size] * (paths // chunk_size) + ([paths % chunk_size] if paths % chunk_size else [])
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    model = (base_cash_flow, growth, discount_rate, terminal_growth, years)
+
+    # The first chunk fixes the histogram range, padded so the tails stay inside it
+    pilot = _simulate_chunk(*model, sizes[0], seeds[0])
+    low, high = np.percentile(pilot, [0.01, 99.99]) if pilot.size else (0.0, 1.0)
+    pad = (high - low) * 0.25 or 1.0
+    edges = np.linspace(low - pad, high + pad, ACCUMULATOR_BINS + 1)
+
+    counts = np.histogram(pilot, bins=edges)[0]
+    below = int((pilot < edges[0]).sum())
+    valid, total = pilot.size, float(pilot.sum())
+
+    jobs = [(edges, *model, size, chunk_seed) for size, chunk_seed in zip(sizes[1:], seeds[1:])]
+    pool = ProcessPoolExecutor(max_workers=min(workers, os.cpu_count() or 1)) if workers > 1 and jobs else None
+    try:
+        results = pool.map(_accumulate_chunk, jobs) if pool else map(_accumulate_chunk, jobs)
+        for chunk_counts, chunk_below, chunk_valid, chunk_total in results:
+            counts += chunk_counts
+            below += chunk_below
+            valid += chunk_valid
+            total += chunk_total
+    finally:
+        if pool:
+            pool.shutdown()
+
+    return MonteCarloResult(
+        paths=paths,
+        valid_paths=valid,
+        mean=total / valid if valid else float("nan"),
+        percentiles={q: _percentile(edges, counts, below, valid, q) for q in percentiles},
+        bin_edges=edges,
+        counts=counts,
+        seconds=time.perf_counter() - started,
+    )
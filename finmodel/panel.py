@@ -0,0 +1,164 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# Margin metric -> numerator field, each divided by Revenue
+MARGINS = {
+    "Gross_Margin_Calc": "Gross_Profit",
+    "Operating_Margin_Calc": "Operating_Income",
+    "Net_Margin": "Net_Income",
+    "FCF_Margin": "FCF",
+}
+
+
+def _ordered_union(label_sets):
+    return list(dict.fromkeys(label for labels in label_sets for label in labels))
+
+
+def growth_rates(values, periods=1):
+    """Period-over-period growth along the last axis, ``(x[t] - x[t-periods]) / |x[t-periods]|``.
+
+    The first ``periods`` entries, and any with a zero or missing base, are NaN.
+    """
+    values = np.asarray(values, dtype=float)
+    growth = np.full(values.shape, np.nan)
+    if values.shape[-1] > periods:
+        current, base = values[..., periods:], values[..., :-periods]
+        np.divide(current - base, np.abs(base), out=growth[..., periods:], where=base != 0)
+    return growth
+
+
+def rolling_sum(values, window=4):
+    """Trailing ``window``-period sums along the last axis (TTM for quarters); the first ``window - 1`` are NaN.
+
+    Any missing quarter inside a window makes that sum NaN.
+    """
+    values = np.asarray(values, dtype=float)
+    sums = np.full(values.shape, np.nan)
+    if values.shape[-1] >= window:
+        sums[..., window - 1:] = np.lib.stride_tricks.sliding_window_view(values, window, axis=-1).sum(axis=-1)
+    return sums
+
+
+def annual_totals(values, quarters, quarters_per_year=4):
+    """Sums consecutive complete years of quarters along the last axis.
+
+    Returns ``(totals, labels)`` with one ``"<first>-<last>"`` label per year;
+    trailing quarters that do not fill a year are left out.
+    """
+    values = np.asarray(values, dtype=float)
+    years = values.shape[-1] // quarters_per_year
+    kept = values[..., :years * quarters_per_year]
+    totals = kept.reshape(*values.shape[:-1], years, quarters_per_year).sum(axis=-1)
+    labels = [f"{quarters[i * quarters_per_year]}-{quarters[(i + 1) * quarters_per_year - 1]}" for i in range(years)]
+    return totals, labels
+
+
+class CompanyPanel:
+    """Company models stacked into one companies x metrics x quarters float64 array.
+
+    Every analytic works on the whole cube at once; cross-sectional ones
+    (ranks, percentiles, peer medians) compare companies within each metric
+    and quarter.
+    """
+
+    def __init__(self, companies, metrics, quarters, values):
+        self.companies = list(companies)
+        self.metrics = list(metrics)
+        self.quarters = list(quarters)
+        self.values = np.asarray(values, dtype=float)
+
+    @classmethod
+    def from_models(cls, models):
+        """Stacks {company: QuarterlyModel}, aligning differing metrics and quarters with NaN."""
+        models = dict(models)
+        layouts = {(model.metrics, model.quarters) for model in models.values()}
+        if len(layouts) == 1:
+            (metrics, quarters), = layouts
+            return cls(models, metrics, quarters, np.stack([model.values for model in models.values()]))
+
+        metrics = _ordered_union(model.metrics for model in models.values())
+        quarters = _ordered_union(model.quarters for model in models.values())
+        metric_rows = {metric: i for i, metric in enumerate(metrics)}
+        quarter_columns = {quarter: i for i, quarter in enumerate(quarters)}
+        values = np.full((len(models), len(metrics), len(quarters)), np.nan)
+        for layer, model in zip(values, models.values()):
+            rows = [metric_rows[metric] for metric in model.metrics]
+            columns = [quarter_columns[quarter] for quarter in model.quarters]
+            layer[np.ix_(rows, columns)] = model.values
+        return cls(models, metrics, quarters, values)
+
+    def _like(self, metrics, values):
+        return CompanyPanel(self.companies, metrics, self.quarters, values)
+
+    def metric(self, name):
+        """Returns one metric as a companies x quarters DataFrame."""
+        return pd.DataFrame(self.values[:, self.metrics.index(name)], index=self.companies, columns=self.quarters)
+
+    def margins(self, margins=MARGINS, denominator="Revenue"):
+        """Divides every margin numerator by ``denominator`` in one pass; missing fields give NaN."""
+        present = {name: field for name, field in margins.items() if field in self.metrics}
+        if denominator not in self.metrics:
+            present = {}
+        values = np.full((len(self.companies), len(margins), len(self.quarters)), np.nan)
+        if present:
+            numerators = self.values[:, [self.metrics.index(field) for field in present.values()]]
+            base = self.values[:, [self.metrics.index(denominator)]]
+            rows = [list(margins).index(name) for name in present]
+            ratios = np.full(numerators.shape, np.nan)
+            np.divide(numerators, base, out=ratios, where=base != 0)
+            values[:, rows] = ratios
+        return self._like(margins, values)
+
+    def with_margins(self, margins=MARGINS, denominator="Revenue"):
+        """Returns the panel with the margin metrics appended."""
+        extra = self.margins(margins, denominator)
+        return self._like(self.metrics + extra.metrics, np.concatenate([self.values, extra.values], axis=1))
+
+    def growth(self, periods=1):
+        """Growth of every metric over ``periods`` quarters (1 for q/q, 4 for y/y)."""
+        return self._like(self.metrics, growth_rates(self.values, periods))
+
+    def ttm(self, flows, window=4):
+        """Trailing-twelve-month sums of the ``flows`` metrics, such as income and cash flow.
+
+        Every other metric (balance sheet lines, shares, rates) keeps its point-in-time quarterly value.
+        """
+        flows = set(flows)
+        rows = [i for i, metric in enumerate(self.metrics) if metric in flows]
+        values = self.values.copy()
+        values[:, rows] = rolling_sum(self.values[:, rows], window)
+        return self._like(self.metrics, values)
+
+    def annual(self, quarters_per_year=4):
+        """Rolls quarters up into complete years; the result's quarters are year labels."""
+        totals, labels = annual_totals(self.values, self.quarters, quarters_per_year)
+        return CompanyPanel(self.companies, self.metrics, labels, totals)
+
+    def _rank(self, **options):
+        flat = pd.DataFrame(self.values.reshape(len(self.companies), -1))
+        return self._like(self.metrics, flat.rank(axis=0, **options).to_numpy().reshape(self.values.shape))
+
+    def rank(self):
+        """Ranks companies within each metric and quarter, 1 being the largest.
+
+        Ties share their average rank and missing values stay NaN.
+        """
+        return self._rank(ascending=False)
+
+    def percentile(self):
+        """Percentile of each company within each metric and quarter, in (0, 1] with 1 the largest."""
+        return self._rank(pct=True)
+
+    def peer_median(self):
+        """Median across companies for each metric and quarter, as a metrics x quarters DataFrame."""
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            medians = np.nanmedian(self.values, axis=0)
+        return pd.DataFrame(medians, index=self.metrics, columns=self.quarters)
+
+    def cross_section(self, quarter):
+        """Returns one quarter as a companies x metrics DataFrame."""
+        column = self.quarters.index(quarter)
+        return pd.DataFrame(self.values[:, :, column], index=self.companies, columns=self.metrics)
@@ -0,0 +1,210 @@
+import math
+import os
+import re
+import tempfile
+
+from .documents import iter_pdf_pages
+
+# Statement -> phrases in its title; a page must contain one to be a candidate
+STATEMENT_TITLES = {
+    "income_statement": ("statements of operations", "statement of operations", "income statement",
+                         "statements of income", "statement of income", "statements of earnings",
+                         "statement of earnings", "statements of comprehensive income"),
+    "balance_sheet": ("balance sheets", "balance sheet", "statements of financial position",
+                      "statement of financial position"),
+    "cash_flow": ("statements of cash flows", "statement of cash flows", "cash flow statement"),
+}
+
+# v4 field -> normalized row labels it is read from, most specific first
+V4_FIELDS = {
+    "Total Revenue": ("total revenue", "total revenues", "total net revenue", "total net revenues", "net revenue",
+                      "net revenues", "revenue", "revenues", "total net sales", "net sales"),
+    "COGS": ("total cost of revenue", "total cost of revenues", "cost of revenue", "cost of revenues",
+             "cost of goods sold", "cost of sales"),
+    "Gross Profit": ("gross profit", "gross margin"),
+    "Sales & Marketing": ("sales and marketing", "selling and marketing", "marketing and sales"),
+    "R&D": ("research and development",),
+    "G&A": ("general and administrative",),
+    "OpEx": ("total operating expenses", "total costs and expenses", "operating expenses"),
+    "Operating Income": ("operating income", "income from operations", "operating income loss",
+                         "income loss from operations"),
+    "Interest Expense": ("interest expense",),
+    "Pretax Income": ("income before income taxes", "income before provision for income taxes",
+                      "income loss before income taxes", "income before taxes", "pretax income"),
+    "Taxes": ("provision for income taxes", "income tax expense", "provision for benefit from income taxes",
+              "income taxes"),
+    "Net Income": ("net income", "net income loss", "net earnings", "net loss"),
+    "EPS": ("diluted", "diluted earnings per share", "diluted net income per share", "earnings per share diluted"),
+    "Shares Outstanding": ("weighted average shares outstanding diluted", "diluted shares",
+                           "weighted average shares used in computing diluted earnings per share",
+                           "shares outstanding"),
+}
+
+# Statement -> labels that confirm a titled page holds the statement itself, not a mention of it
+STATEMENT_LABELS = {
+    "income_statement": tuple(label for labels in V4_FIELDS.values() for label in labels),
+    "balance_sheet": ("total assets", "total liabilities", "stockholders equity", "shareholders equity",
+                      "total current assets", "accounts receivable"),
+    "cash_flow": ("operating activities", "investing activities", "financing activities",
+                  "depreciation and amortization", "capital expenditures"),
+}
+
+# Distinct statement labels a titled page needs before its tables are extracted
+MIN_LABEL_HITS = 5
+
+# Lines from the top of a page that a statement title must appear within
+TITLE_LINES = 10
+
+_NUMBER = re.compile(r"^\(?-?\$?\s*\d[\d,]*(\.\d+)?\s*\)?%?$")
+
+# Tokens that stand for an empty period in a statement row
+_DASHES = {"-", "\u2013", "\u2014"}
+
+
+def normalize_label(label):
+    """Lower-cases a row label and strips punctuation, footnote marks and extra spaces."""
+    label = re.sub(r"[^a-z0-9 ]+", " ", str(label).lower().replace("&", " and "))
+    return " ".join(label.split())
+
+
+def parse_number(cell):
+    """Parses statement numbers such as ``$1,234``, ``(567)`` or ``12.5``; dashes and text give NaN."""
+    if cell is None:
+        return math.nan
+    text = str(cell).strip().replace("$", "").replace(" ", "")
+    if not _NUMBER.match(text):
+        return math.nan
+    value = float(text.strip("()%").replace(",", ""))
+    return -value if text.startswith("(") else value
+
+
+def _label_hits(text, labels):
+    """Counts the labels found as whole words in normalized text.
+
+    A label inside another matched label ("revenue" in "total revenues")
+    is not counted again, so one row cannot score several aliases.
+    """
+    text = f" {text} "
+    matched = {label for label in map(normalize_label, labels) if f" {label} " in text}
+    return sum(not any(label != other and f" {label} " in f" {other} " for other in matched) for label in matched)
+
+
+def statement_scores(text):
+    """Scores one page's text as each statement it may hold.
+
+    Returns {statement: label hits} for statements whose title appears in the
+    first ``TITLE_LINES`` lines and that reach ``MIN_LABEL_HITS`` labels.
+    """
+    lines = [line for line in text.splitlines() if line.strip()]
+    heading = normalize_label(" ".join(lines[:TITLE_LINES]))
+    text = normalize_label(text)
+    scores = {}
+    for statement, titles in STATEMENT_TITLES.items():
+        if any(normalize_label(title) in heading for title in titles):
+            hits = _label_hits(text, STATEMENT_LABELS[statement])
+            if hits >= MIN_LABEL_HITS:
+                scores[statement] = hits
+    return scores
+
+
+def _strongest_first(scores):
+    """Orders {page number: hits} pages by hits, then by page number."""
+    return sorted(scores, key=lambda number: (-scores[number], number))
+
+
+def index_statement_pages(pages):
+    """Finds statement pages from {page number: text} with keyword matching only.
+
+    Returns {statement: [page numbers]}, keeping pages scored by
+    ``statement_scores`` and listing the strongest match first.
+    """
+    scores = {statement: {} for statement in STATEMENT_TITLES}
+    for number, text in pages.items():
+        for statement, hits in statement_scores(text).items():
+            scores[statement][number] = hits
+    return {statement: _strongest_first(pages) for statement, pages in scores.items()}
+
+
+def _text_rows(text):
+    """Splits page text lines into ``[label, *numbers]`` rows, for statements drawn without table rulings."""
+    rows = []
+    for line in text.splitlines():
+        tokens = [token for token in line.split() if token != "$"]
+        split = len(tokens)
+        while split > 0 and (tokens[split - 1] in _DASHES or not math.isnan(parse_number(tokens[split - 1]))):
+            split -= 1
+        if 0 < split < len(tokens):
+            rows.append([" ".join(tokens[:split]), *tokens[split:]])
+    return rows
+
+
+def _first_value(row):
+    for cell in row[1:]:
+        # Percentages belong to margin tables ("as a percentage of revenue"), never to statement values
+        if cell is not None and str(cell).strip().endswith("%"):
+            return math.nan
+        value = parse_number(cell)
+        if not math.isnan(value):
+            return value
+    return math.nan
+
+
+def map_rows(rows, fields=V4_FIELDS):
+    """Maps ``[label, *cells]`` rows onto fields, reading each row's first number (the latest period).
+
+    A field takes the row matching its most specific alias; earlier rows win ties.
+    Rows whose first figure is a percentage are skipped.
+    """
+    best = {}
+    for row in rows:
+        if not row or row[0] is None:
+            continue
+        label = normalize_label(row[0])
+        value = _first_value(row)
+        if math.isnan(value):
+            continue
+        for field, aliases in fields.items():
+            if label in aliases:
+                priority = aliases.index(label)
+                if field not in best or priority < best[field][0]:
+                    best[field] = (priority, value)
+    return {field: value for field, (_, value) in best.items()}
+
+
+def extract_statement_fields(data, cache=None, max_workers=None):
+    """Reads the v4 fields from a PDF filing's statement tables.
+
+    Page text (cached by ``iter_pdf_pages``) is keyword-indexed as it
+    streams in, keeping only statement pages, so pdfplumber's table
+    extraction runs on just those. Returns
+    ``(fields, statement_rows)``: the v4 fields found on the income statement
+    and {statement: [label, *cells] rows} for all three statements, with the
+    rows of the strongest matching page first.
+    """
+    import pdfplumber
+
+    pages, scores = {}, {statement: {} for statement in STATEMENT_TITLES}
+    for number, text in iter_pdf_pages(data, cache, max_workers):
+        for statement, hits in statement_scores(text).items():
+            pages[number] = text
+            scores[statement][number] = hits
+    statement_pages = {statement: _strongest_first(numbers) for statement, numbers in scores.items()}
+    statement_rows = {statement: [] for statement in statement_pages}
+    wanted = sorted({number for numbers in statement_pages.values() for number in numbers})
+    if not wanted:
+        return {}, statement_rows
+
+    page_rows = {}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "document.pdf")
+        with open(path, "wb") as f:
+            f.write(data)
+        with pdfplumber.open(path, pages=[number + 1 for number in wanted]) as pdf:
+            for number, page in zip(wanted, pdf.pages):
+                # Ruled tables first; the text-line rows catch statements laid out with whitespace only
+                tables = page.extract_tables()
+                page_rows[number] = [row for table in tables for row in table] + _text_rows(pages[number])
+
+    for statement, numbers in statement_pages.items():
+        statement_rows[statement] = [row for number in numbers for row in page_rows[number]]
+    return map_rows(statement_rows["income_statement"]), statement_rows
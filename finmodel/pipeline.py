@@ -0,0 +1,161 @@
+import hashlib
+import os
+import pickle
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from .dcf import operating_cash_flow, scenario_valuations
+from .ratios import key_ratios
+from .report import report_bytes
+from .snapshot import TickerSnapshot, fetch_snapshot
+
+DEFAULT_MAX_BYTES = int(os.environ.get("FINMODEL_STAGE_CACHE_MB", "256")) * 1024 * 1024
+
+# Pipeline stages in dependency order; each only reruns when its own inputs change
+STAGES = ("fetch", "forecast", "value", "ratios", "report")
+
+
+def _update(digest, value):
+    if isinstance(value, TickerSnapshot):
+        digest.update(b"snapshot:" + value.ticker.encode() + value.data_version().encode())
+    elif isinstance(value, dict):
+        digest.update(b"dict:%d" % len(value))
+        for key, item in value.items():
+            _update(digest, key)
+            _update(digest, item)
+    elif isinstance(value, (list, tuple)):
+        digest.update(b"seq:%d" % len(value))
+        for item in value:
+            _update(digest, item)
+    elif type(value).__module__.startswith("pandas"):
+        import pandas as pd
+
+        digest.update(repr((type(value).__name__, list(value.index), list(getattr(value, "columns", [])))).encode())
+        try:
+            digest.update(pd.util.hash_pandas_object(value, index=False).values.tobytes())
+        except TypeError:
+            digest.update(repr(value.to_numpy().tolist()).encode())
+    elif hasattr(value, "tobytes") and hasattr(value, "dtype"):
+        digest.update(repr((str(value.dtype), getattr(value, "shape", ()))).encode() + value.tobytes())
+    else:
+        digest.update(repr(value).encode())
+
+
+def input_hash(*inputs):
+    """Returns a sha1 hex digest of stage inputs: snapshots, frames, arrays, containers and scalars."""
+    digest = hashlib.sha1()
+    for value in inputs:
+        _update(digest, value)
+    return digest.hexdigest()
+
+
+def _size(value):
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(value)
+
+
+class StageCache:
+    """Thread-safe LRU of stage results keyed by (stage, input hash) within a byte budget.
+
+    Meant to be created once per process and shared by every session.
+    Results larger than the whole budget are returned but never stored, and
+    exceptions are never cached. ``stats`` reports hits and misses per stage.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = Counter()
+        self.misses = Counter()
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def memoize(self, stage, inputs, compute, ttl=None):
+        """Returns ``compute()`` for ``stage``, reusing the stored result while ``inputs`` hash the same.
+
+        ``ttl`` seconds bounds how long a result is reused.
+        """
+        key = (stage, input_hash(*inputs))
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[2] is None or entry[2] > now):
+                self._entries.move_to_end(key)
+                self.hits[stage] += 1
+                return entry[0]
+            self.misses[stage] += 1
+
+        value = compute()
+        size = _size(value)
+        if size <= self.max_bytes:
+            with self._lock:
+                previous = self._entries.pop(key, None)
+                if previous is not None:
+                    self.total_bytes -= previous[1]
+                self._entries[key] = (value, size, now + ttl if ttl is not None else None)
+                self.total_bytes += size
+                while self.total_bytes > self.max_bytes:
+                    _, (_, evicted, _) = self._entries.popitem(last=False)
+                    self.total_bytes -= evicted
+        return value
+
+    def stats(self):
+        """Returns one {Stage, Hits, Misses, Entries, MB} row per stage seen so far."""
+        with self._lock:
+            entries, sizes = Counter(), Counter()
+            for (stage, _), (_, size, _) in self._entries.items():
+                entries[stage] += 1
+                sizes[stage] += size
+            stages = [stage for stage in STAGES if stage in self.hits or stage in self.misses]
+            stages += sorted((self.hits.keys() | self.misses.keys()) - set(STAGES))
+            return [{"Stage": stage, "Hits": self.hits[stage], "Misses": self.misses[stage],
+                     "Entries": entries[stage], "MB": sizes[stage] / 1024 / 1024} for stage in stages]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+            self.hits.clear()
+            self.misses.clear()
+
+
+class ValuationPipeline:
+    """The valuation apps' fetch -> forecast -> value -> ratios -> report flow over a shared StageCache.
+
+    Each stage is memoized on a hash of its own inputs, so changing the
+    projection years reruns ``value`` and ``report`` but not ``fetch`` or
+    ``forecast``. Fetches are reused for the statement cache's TTL.
+    """
+
+    def __init__(self, stages, statement_cache=None, limiter=None):
+        self.stages = stages
+        self.statement_cache = statement_cache
+        self.limiter = limiter
+
+    def stage(self, name, inputs, compute, ttl=None):
+        """Memoizes an app-specific stage in the shared cache."""
+        return self.stages.memoize(name, inputs, compute, ttl)
+
+    def fetch(self, ticker):
+        cache = self.statement_cache
+        offline = cache.offline if cache is not None else False
+        return self.stage("fetch", (ticker, offline), lambda: fetch_snapshot(ticker, cache, self.limiter),
+                          ttl=cache.ttl if cache is not None else None)
+
+    def forecast(self, snapshot):
+        """Returns the base operating cash flow the projections start from."""
+        return self.stage("forecast", (snapshot,), lambda: operating_cash_flow(snapshot))
+
+    def value(self, base_cash_flow, discount_rate, terminal_growth, years):
+        return self.stage("value", (base_cash_flow, discount_rate, terminal_growth, years),
+                          lambda: scenario_valuations(base_cash_flow, discount_rate, terminal_growth, years))
+
+    def ratios(self, snapshot):
+        return self.stage("ratios", (snapshot.info,), lambda: key_ratios(snapshot.info))
+
+    def report(self, snapshot, extra_sheets):
+        return self.stage("report", (snapshot, extra_sheets), lambda: report_bytes(snapshot, extra_sheets))
@@ -0,0 +1,138 @@
+import numpy as np
+import pandas as pd
+
+INCOME_STATEMENT_LINES = ["Revenue", "Operating Income", "Other Income/Expense", "Pretax Income", "Taxes",
+                          "Net Income"]
+CASH_FLOW_LINES = ["Net Income", "D&A", "SBC", "Change in Working Capital", "CFFO", "Capital Expenditures",
+                   "Net Securities Purchases", "Other CFFI", "CFFI", "Exercise Options", "Repurchases", "CFFF",
+                   "Net Change in Cash"]
+BALANCE_SHEET_LINES = ["Cash", "Working Capital", "Securities", "Long-Term & Other Assets", "Total Assets",
+                       "Liabilities", "S/E", "Liabilities + S/E", "Balance Check"]
+
+STATEMENT_LINES = {
+    "Income Statement": INCOME_STATEMENT_LINES,
+    "Cash Flow Statement": CASH_FLOW_LINES,
+    "Balance Sheet": BALANCE_SHEET_LINES,
+}
+
+
+class Projection:
+    """Linked three-statement projection: every line item is a scenarios x periods array."""
+
+    def __init__(self, lines, scenarios):
+        self.lines = lines
+        self.scenarios = scenarios
+
+    @property
+    def shape(self):
+        return self.lines["Net Income"].shape
+
+    def statement(self, name, scenario=0):
+        """Returns one statement for one scenario as a line items x periods DataFrame."""
+        periods = [f"P{t}" for t in range(1, self.shape[1] + 1)]
+        return pd.DataFrame([self.lines[line][scenario] for line in STATEMENT_LINES[name]],
+                            index=STATEMENT_LINES[name], columns=periods)
+
+    def summary(self, lines=("Revenue", "Net Income", "CFFO", "Cash", "S/E"), period=-1):
+        """Returns each scenario's drivers and the given lines in one period, one row per scenario."""
+        return pd.DataFrame({**self.scenarios, **{line: self.lines[line][:, period] for line in lines}})
+
+
+def _value(base, field):
+    value = base.get(field, 0)
+    return 0.0 if value is None or pd.isna(value) else float(value)
+
+
+def project_statements(base, periods, growth, operating_margin=None, tax_rate=None):
+    """Rolls a v1/v2 entry's income statement, cash flow and balance sheet forward.
+
+    ``growth`` (and optionally ``operating_margin`` and ``tax_rate``) are
+    decimals, scalars or one value per scenario, so the result covers
+    len(scenarios) x ``periods`` at once. Operating income, D&A, SBC,
+    working capital and capex scale with revenue; other flows repeat each
+    period. Liabilities are held, and each balance sheet line is the base
+    balance plus the cumulative sum of its flows, so assets equal
+    liabilities + equity in every period by construction and Balance
+    Check stays zero.
+    """
+    growth = np.atleast_1d(np.asarray(growth, dtype=float))
+    base_margin = _value(base, "Operating Margin") / 100
+    base_tax = _value(base, "Tax Rate") / 100
+    scenario_count = len(growth)
+    margin = np.broadcast_to(base_margin if operating_margin is None else operating_margin, (scenario_count,))
+    tax = np.broadcast_to(base_tax if tax_rate is None else tax_rate, (scenario_count,))
+    margin, tax = margin.astype(float)[:, None], tax.astype(float)[:, None]
+
+    # Revenue index per scenario and period; every revenue-linked line is its base value times it
+    index = np.cumprod(np.broadcast_to(1 + growth[:, None], (scenario_count, periods)), axis=1)
+    other_income = _value(base, "Other Income/Expense")
+    base_operating_income = (_value(base, "Model Net Income") / (1 - base_tax) if base_tax < 1 else 0.0) - other_income
+    if base_margin > 0:
+        revenue = base_operating_income / base_margin * index
+        operating_income = revenue * margin
+    else:
+        revenue = np.full(index.shape, np.nan)
+        operating_income = base_operating_income * index
+    pretax = operating_income + other_income
+    taxes = pretax * tax
+    net_income = pretax - taxes
+
+    def repeated(field, sign=1):
+        return np.full(index.shape, sign * _value(base, field))
+
+    d_a = _value(base, "D&A") * index
+    sbc = _value(base, "SBC") * index
+    working_capital = _value(base, "Working Capital") * index
+    change_in_wc = np.diff(working_capital, axis=1, prepend=_value(base, "Working Capital"))
+    cffo = net_income + d_a + sbc - change_in_wc
+
+    capex = _value(base, "PP&E") * index
+    securities_purchases = repeated("Purchases of Securities") - repeated("Sales of Securities")
+    other_cffi = repeated("Other CFFI")
+    cffi = -capex - securities_purchases + other_cffi
+    options, repurchases = repeated("Exercise Options"), repeated("Repurchases")
+    cfff = options - repurchases
+    change_in_cash = cffo + cffi + cfff
+
+    equity_base = _value(base, "S/E")
+    assets_base = _value(base, "L+S/E") or _value(base, "Debt") + _value(base, "Other Liabilities") + equity_base
+    cash_base = _value(base, "Cash")
+    cash = cash_base + np.cumsum(change_in_cash, axis=1)
+    securities = np.cumsum(securities_purchases, axis=1)
+    long_term = (assets_base - cash_base - _value(base, "Working Capital")
+                 + np.cumsum(capex - d_a - other_cffi, axis=1))
+    total_assets = cash + working_capital + securities + long_term
+    liabilities = np.full(index.shape, assets_base - equity_base)
+    equity = equity_base + np.cumsum(net_income + sbc + options - repurchases, axis=1)
+
+    lines = {
+        "Revenue": revenue,
+        "Operating Income": operating_income,
+        "Other Income/Expense": np.full(index.shape, other_income),
+        "Pretax Income": pretax,
+        "Taxes": taxes,
+        "Net Income": net_income,
+        "D&A": d_a,
+        "SBC": sbc,
+        "Change in Working Capital": -change_in_wc,
+        "CFFO": cffo,
+        "Capital Expenditures": -capex,
+        "Net Securities Purchases": -securities_purchases,
+        "Other CFFI": other_cffi,
+        "CFFI": cffi,
+        "Exercise Options": options,
+        "Repurchases": -repurchases,
+        "CFFF": cfff,
+        "Net Change in Cash": change_in_cash,
+        "Cash": cash,
+        "Working Capital": working_capital,
+        "Securities": securities,
+        "Long-Term & Other Assets": long_term,
+        "Total Assets": total_assets,
+        "Liabilities": liabilities,
+        "S/E": equity,
+        "Liabilities + S/E": liabilities + equity,
+        "Balance Check": total_assets - liabilities - equity,
+    }
+    scenarios = {"Growth": growth, "Operating Margin": margin[:, 0], "Tax Rate": tax[:, 0]}
+    return Projection(lines, scenarios)
@@ -0,0 +1,315 @@
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+from .panel import rolling_sum
+
+LABEL_COLUMN = "A"
+
+# Quarters summed into one trailing-twelve-month figure
+TTM_QUARTERS = 4
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _quarter_frame(worksheet):
+    """Streams one worksheet, keeping only the label column and the quarter columns as float64."""
+    rows = worksheet.iter_rows(values_only=True)
+    header = next(rows, ())
+    if LABEL_COLUMN not in header:
+        raise ValueError(f"Sheet {worksheet.title!r} has no {LABEL_COLUMN!r} label column")
+    label_index = header.index(LABEL_COLUMN)
+    quarter_indexes = [i for i, name in enumerate(header) if isinstance(name, str) and name.startswith('Q')]
+
+    labels = []
+    values = []
+    for row in rows:
+        labels.append(row[label_index] if label_index < len(row) else None)
+        values.extend(_to_float(row[i]) if i < len(row) else np.nan for i in quarter_indexes)
+
+    quarters = [header[i] for i in quarter_indexes]
+    frame = pd.DataFrame(np.array(values, dtype=float).reshape(len(labels), len(quarters)), columns=quarters)
+    frame.insert(0, LABEL_COLUMN, labels)
+    return frame
+
+
+def read_quarter_sheets(source, sheet_names=None):
+    """Reads the label and quarter columns of every sheet (or ``sheet_names``) in one read-only open.
+
+    Returns ``{sheet name: frame}`` with frames shaped like ``read_financial_sheet``.
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        names = workbook.sheetnames if sheet_names is None else sheet_names
+        return {name: _quarter_frame(workbook[name]) for name in names}
+    finally:
+        workbook.close()
+
+
+def read_financial_sheet(uploaded_file):
+    """Reads the label column and float64 quarter columns of an uploaded workbook's first sheet."""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(uploaded_file, read_only=True, data_only=True)
+    try:
+        return _quarter_frame(workbook.worksheets[0])
+    finally:
+        workbook.close()
+
+
+def get_quarters(df):
+    """Returns the quarter columns, i.e. headers starting with "Q"."""
+    return [col for col in df.columns if col.startswith('Q')]
+
+
+# Model field -> column-A labels it is read from; the first label present in a sheet wins
+INCOME_STATEMENT = {
+    "Model_Net_Income": ("Model NI",),
+    "Reported_Net_Income": ("Reported NI",),
+    "D&A": ("D&A",),
+    "SBC": ("SBC",),
+    "Total_Customers": ("Total Customers", "Customers"),
+    "ARPU": ("ARPU",),
+    "Commercial_Revenue": ("Commercial", "Commercial Revenue"),
+    "Government_Revenue": ("Government", "Government Revenue"),
+    "COGS": ("COGS",),
+    "Gross_Profit": ("Gross Profit",),
+    "S&M": ("S&M",),
+    "R&D": ("R&D",),
+    "G&A": ("G&A",),
+    "Operating_Income": ("OpInc", "Operating Income"),
+    "Interest": ("Interest",),
+    "Pretax_Income": ("Pretax Income", "Pre-tax Income"),
+    "Taxes": ("Taxes",),
+    "Net_Income": ("Net Income",),
+    "EPS": ("EPS",),
+    "Shares": ("SHARES", "Shares"),
+    "Customers_yly": ("Customers yly", "Customers y/y"),
+    "ARPU_yly": ("ARPU yly", "ARPU y/y"),
+    "Commercial_yly": ("Commercial yly", "Commercial y/y"),
+    "Government_yly": ("Government yly", "Government y/y"),
+}
+
+BALANCE_SHEET = {
+    "Debt": ("Debt",),
+    "Stockholders_Equity": ("S/E",),
+    "Net_Cash": ("Net Cash",),
+    "AR": ("AR", "A/R"),
+    "PP&E": ("PP&E",),
+    "Lease": ("Lease",),
+    "Other_Assets": ("Other Assets",),
+    "Assets": ("Assets",),
+    "AVP": ("AVP",),
+    "Accrued": ("Accrued",),
+    "D/R": ("D/R",),
+    "Deposits": ("Deposits",),
+}
+
+CASH_FLOW = {
+    "Cash_Flow_From_Operations": ("CFFO",),
+    "Purchases_of_Securities": ("Purchases of Securities",),
+    "CFFF": ("CFFF",),
+    "FX": ("FX",),
+    "Cash_Increase": ("Cash Increase",),
+    "FCF": ("FCF",),
+}
+
+OPERATIONAL = {
+    "ARPU_yly": ("ARPU yly", "ARPU y/y"),
+    "Revenue_yly": ("Revenue yly", "Revenue y/y"),
+    "Gross_Margin": ("Gross Margin",),
+    "Operating_Margin": ("Operating Margin",),
+    "Tax_Rate": ("Tax Rate",),
+    "Headcount": ("Headcount",),
+    "Headcount_y/y": ("Headcount y/y", "Headcount yly"),
+}
+
+# Every field the dashboard models, in the order the statements have always been merged
+MODEL_SCHEMA = {**INCOME_STATEMENT, **BALANCE_SHEET, **CASH_FLOW, **OPERATIONAL}
+
+# Per-quarter flows, which sum into trailing-twelve-month and annual figures; the remaining fields
+# (balance sheet lines, shares, counts, rates and valuations) are point-in-time values
+FLOW_METRICS = (
+    "Model_Net_Income", "Reported_Net_Income", "D&A", "SBC", "Commercial_Revenue", "Government_Revenue", "Revenue",
+    "COGS", "Gross_Profit", "S&M", "R&D", "G&A", "Operating_Income", "Interest", "Pretax_Income", "Taxes",
+    "Net_Income", "EPS", "Cash_Flow_From_Operations", "Purchases_of_Securities", "Free_Cash_Flow_Calc", "CFFF", "FX",
+    "Cash_Increase", "FCF",
+)
+
+
+def index_line_items(df, quarters):
+    """Indexes a sheet by its column-A label once, keeping the first row per label as float64 quarters."""
+    items = df.drop_duplicates(LABEL_COLUMN).set_index(LABEL_COLUMN)[quarters]
+    return items.apply(pd.to_numeric, errors="coerce")
+
+
+def extract_line_items(items, schema):
+    """Resolves a schema against indexed line items with a single reindex.
+
+    Returns ``(fields, block)`` where ``block`` is a fields x quarters float64
+    array and fields whose labels are all missing are NaN rows.
+    """
+    present = items.index
+    labels = [next((label for label in aliases if label in present), aliases[0]) for aliases in schema.values()]
+    return list(schema), items.reindex(labels).to_numpy(dtype=float)
+
+
+def add_derived_fields(model):
+    """Adds Revenue and Free_Cash_Flow_Calc right after the line items they are computed from."""
+    derived = {}
+    for field, row in model.items():
+        derived[field] = row
+        if field == "Government_Revenue" and "Commercial_Revenue" in model:
+            derived["Revenue"] = model["Commercial_Revenue"] + row
+        elif field == "Purchases_of_Securities" and "Cash_Flow_From_Operations" in model:
+            derived["Free_Cash_Flow_Calc"] = model["Cash_Flow_From_Operations"] - np.abs(row)
+    return derived
+
+
+def _build(df, quarters, schema):
+    fields, block = extract_line_items(index_line_items(df, quarters), schema)
+    return add_derived_fields(dict(zip(fields, block)))
+
+
+def build_income_statement(df, quarters):
+    """Builds the income statement model."""
+    return _build(df, quarters, INCOME_STATEMENT)
+
+
+def build_balance_sheet(df, quarters):
+    """Builds the balance sheet model."""
+    return _build(df, quarters, BALANCE_SHEET)
+
+
+def build_cash_flow_model(df, quarters):
+    """Builds the cash flow model."""
+    return _build(df, quarters, CASH_FLOW)
+
+
+def build_operational_model(df, quarters):
+    """Builds the operational metrics model."""
+    return _build(df, quarters, OPERATIONAL)
+
+
+def build_financial_model(df, quarters):
+    """Builds all four statement models from one index and one reindex of the sheet."""
+    return _build(df, quarters, MODEL_SCHEMA)
+
+
+def valuation_model(net_income, fcf, eps, shares, growth_rate=0.05, discount_rate=0.1, years=5):
+    """Values a company model by DCF and by a standard P/E multiple."""
+    valuation = {}
+    cash_flows = fcf if fcf.any() else net_income
+    if cash_flows.any():
+        terminal_value = cash_flows[-1] * (1 + growth_rate) / (discount_rate - growth_rate)
+        cash_flows_list = [cf * (1 + growth_rate) for cf in cash_flows[:-1]]
+        cash_flows_list.append(terminal_value / ((1 + discount_rate) ** (years - 1)))
+        dcf_value = sum(cf / ((1 + discount_rate) ** i) for i, cf in enumerate(cash_flows_list, 1))
+        valuation['DCF'] = dcf_value
+    else:
+        valuation['DCF'] = np.nan
+    
+    if eps.any() and shares.any():
+        pe_ratio = 15  # Assume a standard P/E ratio (adjust based on industry)
+        pe_value = eps[-1] * shares[-1] * pe_ratio
+        valuation['P/E'] = pe_value
+    else:
+        valuation['P/E'] = np.nan
+    
+    return valuation
+
+
+# Label tuple -> (interned tuple, {label: position}), shared by every model with that layout
+_LAYOUTS = {}
+
+
+def _intern(labels):
+    labels = tuple(labels)
+    layout = _LAYOUTS.get(labels)
+    if layout is None:
+        layout = _LAYOUTS[labels] = (labels, {label: i for i, label in enumerate(labels)})
+    return layout
+
+
+class QuarterlyModel:
+    """A company model stored as one contiguous float64 matrix of metrics x quarters.
+
+    ``metrics`` and ``quarters`` are interned tuples shared by every model with
+    the same layout. Rows are read as NumPy views with ``model[metric]``.
+    """
+
+    __slots__ = ("metrics", "quarters", "values", "_rows")
+
+    def __init__(self, metrics, quarters, values):
+        self.metrics, self._rows = _intern(metrics)
+        self.quarters, _ = _intern(quarters)
+        self.values = np.ascontiguousarray(values, dtype=float)
+        if self.values.shape != (len(self.metrics), len(self.quarters)):
+            raise ValueError(f"Expected a {len(self.metrics)} x {len(self.quarters)} matrix, "
+                             f"got {self.values.shape}")
+
+    @classmethod
+    def from_fields(cls, fields, quarters):
+        """Packs {metric: row or scalar} into one matrix, broadcasting scalars across the quarters."""
+        values = np.empty((len(fields), len(quarters)))
+        for row, value in zip(values, fields.values()):
+            row[:] = value
+        return cls(fields.keys(), quarters, values)
+
+    def __getitem__(self, metric):
+        return self.values[self._rows[metric]]
+
+    def __contains__(self, metric):
+        return metric in self._rows
+
+    def __len__(self):
+        return len(self.metrics)
+
+    def __reduce__(self):
+        return QuarterlyModel, (self.metrics, self.quarters, self.values)
+
+    def get(self, metric, default=None):
+        return self[metric] if metric in self._rows else default
+
+    def to_frame(self):
+        """Returns the model as a quarters x metrics DataFrame, the layout the exports use."""
+        return pd.DataFrame(self.values.T, index=list(self.quarters), columns=list(self.metrics))
+
+
+def model_workbook(upload):
+    """Loads, models and values one ``(name, bytes)`` upload into a ``QuarterlyModel``.
+
+    Self-contained so it can run in a worker process.
+    """
+    _, data = upload
+    df = read_financial_sheet(BytesIO(data))
+    quarters = get_quarters(df)
+    financial_model = build_financial_model(df, quarters)
+
+    missing = np.full(len(quarters), np.nan)
+    valuation = valuation_model(
+        financial_model.get('Net_Income', missing),
+        financial_model.get('FCF', missing),
+        financial_model.get('EPS', missing),
+        financial_model.get('Shares', missing)
+    )
+    financial_model['Valuation_DCF'] = valuation.get('DCF', np.nan)
+    financial_model['Valuation_PE'] = valuation.get('P/E', np.nan)
+
+    # The same valuation on non-overlapping trailing years ending at the latest quarter, so every
+    # quarter's flow is counted once and the last period is the latest TTM figure
+    years = slice(TTM_QUARTERS - 1 + (len(quarters) - TTM_QUARTERS) % TTM_QUARTERS, None, TTM_QUARTERS)
+    ttm = {field: rolling_sum(financial_model.get(field, missing))[years] for field in ('Net_Income', 'FCF', 'EPS')}
+    valuation = valuation_model(ttm['Net_Income'], ttm['FCF'], ttm['EPS'],
+                                financial_model.get('Shares', missing)[years])
+    financial_model['Valuation_DCF_TTM'] = valuation.get('DCF', np.nan)
+    financial_model['Valuation_PE_TTM'] = valuation.get('P/E', np.nan)
+    return QuarterlyModel.from_fields(financial_model, quarters)
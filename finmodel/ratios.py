@@ -0,0 +1,13 @@
+def key_ratios(info):
+    """Extracts the peer comparison ratios from a ticker's info dict."""
+    return {
+        "Market Cap": info.get("marketCap"),
+        "PE Ratio": info.get("trailingPE"),
+        "EV/EBITDA": info.get("enterpriseValue") / info.get("ebitda") if info.get("ebitda") else None,
+        "Debt to Equity": info.get("debtToEquity"),
+        "Return on Equity (ROE)": info.get("returnOnEquity"),
+        "Price to Book (P/B)": info.get("priceToBook")
+    }
+
+
+RATIO_NAMES = list(key_ratios({}))
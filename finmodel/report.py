@@ -0,0 +1,98 @@
+import math
+import re
+from datetime import date, datetime
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+# Workbook sheet -> TickerSnapshot field, in the order the apps have always written them
+STATEMENT_SHEETS = {
+    "Income Statement": "income_stmt",
+    "Balance Sheet": "balance_sheet",
+    "Cash Flow Statement": "cash_flow",
+}
+
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Excel's sheet name limit
+MAX_SHEET_NAME = 31
+
+_INVALID_SHEET_CHARS = re.compile(r"[\[\]:*?/\\]")
+
+
+def _cell(value):
+    """Converts a pandas/numpy value into something xlsxwriter writes natively."""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if pd.api.types.is_scalar(value) and pd.isna(value):
+        # NaT is a datetime, but datetime(NaT.year, ...) raises
+        return None
+    if isinstance(value, datetime):
+        return value.date().isoformat() if value == datetime(value.year, value.month, value.day) else value.isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def sheet_name(name, used=()):
+    """Makes ``name`` a valid Excel sheet name that isn't in ``used`` (compared case-insensitively).
+
+    Replaces ``[]:*?/\\`` with ``_``, trims edge apostrophes, cuts to 31
+    characters and appends `` (2)``, `` (3)``, ... to duplicates.
+    """
+    base = _INVALID_SHEET_CHARS.sub("_", str(name)).strip("'")[:MAX_SHEET_NAME].strip("'") or "Sheet"
+    taken = {existing.lower() for existing in used}
+    candidate, number = base, 1
+    while candidate.lower() in taken:
+        number += 1
+        suffix = f" ({number})"
+        candidate = base[:MAX_SHEET_NAME - len(suffix)] + suffix
+    return candidate
+
+
+def write_frame(worksheet, df, first_row=0):
+    """Writes a DataFrame, index first, strictly row by row so constant-memory worksheets work.
+
+    Returns the next free row.
+    """
+    worksheet.write_row(first_row, 0, [_cell(df.index.name) or "", *map(_cell, df.columns)])
+    row = first_row
+    for row, (label, values) in enumerate(zip(df.index, df.itertuples(index=False, name=None)), first_row + 1):
+        worksheet.write_row(row, 0, [_cell(label), *map(_cell, values)])
+    return row + 1
+
+
+def write_workbook(target, sheets, constant_memory=False):
+    """Writes {sheet name: DataFrame} to an Excel workbook at ``target``, a path or file-like.
+
+    Sheet names are cleaned with ``sheet_name``. Workbooks are assembled in
+    memory by default; ``constant_memory`` instead flushes each row as it is
+    written, for workbooks too large to hold.
+    """
+    import xlsxwriter
+
+    options = {"constant_memory": True} if constant_memory else {"in_memory": True}
+    workbook = xlsxwriter.Workbook(target, options)
+    used = []
+    for name, df in sheets.items():
+        used.append(sheet_name(name, used))
+        write_frame(workbook.add_worksheet(used[-1]), df)
+    workbook.close()
+    return target
+
+
+def write_report(target, snapshot, extra_sheets):
+    """Writes a ticker's statements followed by ``extra_sheets`` to an Excel workbook."""
+    sheets = {name: getattr(snapshot, field) for name, field in STATEMENT_SHEETS.items()}
+    sheets.update(extra_sheets)
+    return write_workbook(target, sheets)
+
+
+def report_bytes(snapshot, extra_sheets):
+    """Builds a ticker's report workbook entirely in memory and returns its bytes."""
+    return write_report(BytesIO(), snapshot, extra_sheets).getvalue()
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from .cache import CacheMiss
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Snapshot field -> yf.Ticker attribute it is fetched from
+STATEMENTS = {
+    "income_stmt": "financials",
+    "balance_sheet": "balance_sheet",
+    "cash_flow": "cashflow",
+    "info": "info",
+}
+
+# Host yfinance sends statement requests to, used as the rate-limit key
+YAHOO_HOST = "query2.finance.yahoo.com"
+
+
+@dataclass
+class TickerSnapshot:
+    """One fetch of a ticker's statements and info, shared by every calculation."""
+    ticker: str
+    income_stmt: pd.DataFrame
+    balance_sheet: pd.DataFrame
+    cash_flow: pd.DataFrame
+    info: dict
+
+    def data_version(self):
+        """Returns a short hash of the statements and info, for keying anything derived from them."""
+        import pandas as pd
+
+        digest = hashlib.sha1()
+        for field in STATEMENTS:
+            value = getattr(self, field)
+            if field == "info":
+                digest.update(repr(sorted(value.items())).encode())
+            else:
+                digest.update(repr((list(value.index), list(value.columns))).encode())
+                digest.update(pd.util.hash_pandas_object(value, index=False).values.tobytes())
+        return digest.hexdigest()[:16]
+
+
+def _is_empty(value):
+    return value is None or len(value) == 0
+
+
+def fetch_snapshot(ticker, cache=None, limiter=None):
+    """Builds a TickerSnapshot, serving each statement from ``cache`` when possible.
+
+    Network fetches wait on ``limiter`` (a RateLimiter) when one is given.
+    Raises CacheMiss if the cache is offline and a statement was never cached.
+    """
+    stock = None
+    fields = {}
+    for field, attr in STATEMENTS.items():
+        value = cache.get(ticker, field) if cache is not None else None
+        if value is None:
+            if cache is not None and cache.offline:
+                raise CacheMiss(f"{ticker} {field} is not cached (offline mode)")
+            if stock is None:
+                # Deferred so runs served entirely from the cache never import yfinance
+                import yfinance as yf
+                stock = yf.Ticker(ticker)
+            if limiter is not None:
+                limiter.wait(YAHOO_HOST)
+            value = getattr(stock, attr)
+            # Empty frames usually mean a failed fetch; don't pin them for a whole TTL.
+            if cache is not None and not _is_empty(value):
+                cache.put(ticker, field, value)
+        fields[field] = value
+    return TickerSnapshot(ticker=ticker, **fields)
+
+
+def load_local_snapshot(ticker, data_dir):
+    """Builds a TickerSnapshot from files under ``data_dir/<ticker>/`` instead of Yahoo Finance.
+
+    Expects ``income_stmt.csv``, ``balance_sheet.csv`` and ``cash_flow.csv``
+    with line items as the first column, plus ``info.json``. Used as an
+    offline stand-in for batch runs and tests.
+    """
+    import pandas as pd
+
+    directory = os.path.join(data_dir, ticker)
+    fields = {field: pd.read_csv(os.path.join(directory, f"{field}.csv"), index_col=0)
+              for field in STATEMENTS if field != "info"}
+    with open(os.path.join(directory, "info.json")) as f:
+        fields["info"] = json.load(f)
+    return TickerSnapshot(ticker=ticker, **fields)
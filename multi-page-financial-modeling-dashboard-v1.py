@@ -1,127 +1,27 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
+import os
 from io import BytesIO
-
-# Function to read financial data from an uploaded Excel file
-def load_financial_data(uploaded_file):
-    try:
-        df = pd.read_excel(uploaded_file)
-        return df
-    except Exception as e:
-        st.error(f"Error loading file: {e}")
-        return None
-
-# Function to identify and extract quarters from column headers
-def get_quarters(df):
-    return [col for col in df.columns if col.startswith('Q')]
-
-# Function to build income statement model
-def build_income_statement(df, quarters):
-    income_model = {}
-    income_model['Model_Net_Income'] = df[df['A'] == 'Model NI'][quarters].values[0] if not df[df['A'] == 'Model NI'].empty else np.nan
-    income_model['Reported_Net_Income'] = df[df['A'] == 'Reported NI'][quarters].values[0] if not df[df['A'] == 'Reported NI'].empty else np.nan
-    income_model['D&A'] = df[df['A'] == 'D&A'][quarters].values[0] if not df[df['A'] == 'D&A'].empty else np.nan
-    income_model['SBC'] = df[df['A'] == 'SBC'][quarters].values[0] if not df[df['A'] == 'SBC'].empty else np.nan
-    income_model['Total_Customers'] = df[df['A'] == 'Total Customers'][quarters].values[0] if not df[df['A'] == 'Total Customers'].empty else np.nan
-    income_model['ARPU'] = df[df['A'] == 'ARPU'][quarters].values[0] if not df[df['A'] == 'ARPU'].empty else np.nan
-    income_model['Commercial_Revenue'] = df[df['A'] == 'Commercial'][quarters].values[0] if not df[df['A'] == 'Commercial'].empty else np.nan
-    income_model['Government_Revenue'] = df[df['A'] == 'Government'][quarters].values[0] if not df[df['A'] == 'Government'].empty else np.nan
-    income_model['Revenue'] = (income_model.get('Commercial_Revenue', np.zeros(len(quarters))) + 
-                              income_model.get('Government_Revenue', np.zeros(len(quarters))))
-    income_model['COGS'] = df[df['A'] == 'COGS'][quarters].values[0] if not df[df['A'] == 'COGS'].empty else np.nan
-    income_model['Gross_Profit'] = df[df['A'] == 'Gross Profit'][quarters].values[0] if not df[df['A'] == 'Gross Profit'].empty else np.nan
-    income_model['S&M'] = df[df['A'] == 'S&M'][quarters].values[0] if not df[df['A'] == 'S&M'].empty else np.nan
-    income_model['R&D'] = df[df['A'] == 'R&D'][quarters].values[0] if not df[df['A'] == 'R&D'].empty else np.nan
-    income_model['G&A'] = df[df['A'] == 'G&A'][quarters].values[0] if not df[df['A'] == 'G&A'].empty else np.nan
-    income_model['Operating_Income'] = df[df['A'] == 'OpInc'][quarters].values[0] if not df[df['A'] == 'OpInc'].empty else np.nan
-    income_model['Interest'] = df[df['A'] == 'Interest'][quarters].values[0] if not df[df['A'] == 'Interest'].empty else np.nan
-    income_model['Pretax_Income'] = df[df['A'] == 'Pretax Income'][quarters].values[0] if not df[df['A'] == 'Pretax Income'].empty else np.nan
-    income_model['Taxes'] = df[df['A'] == 'Taxes'][quarters].values[0] if not df[df['A'] == 'Taxes'].empty else np.nan
-    income_model['Net_Income'] = df[df['A'] == 'Net Income'][quarters].values[0] if not df[df['A'] == 'Net Income'].empty else np.nan
-    income_model['EPS'] = df[df['A'] == 'EPS'][quarters].values[0] if not df[df['A'] == 'EPS'].empty else np.nan
-    income_model['Shares'] = df[df['A'] == 'SHARES'][quarters].values[0] if not df[df['A'] == 'SHARES'].empty else np.nan
-    income_model['Customers_yly'] = df[df['A'] == 'Customers yly'][quarters].values[0] if not df[df['A'] == 'Customers yly'].empty else np.nan
-    income_model['ARPU_yly'] = df[df['A'] == 'ARPU yly'][quarters].values[0] if not df[df['A'] == 'ARPU yly'].empty else np.nan
-    income_model['Commercial_yly'] = df[df['A'] == 'Commercial yly'][quarters].values[0] if not df[df['A'] == 'Commercial yly'].empty else np.nan
-    income_model['Government_yly'] = df[df['A'] == 'Government yly'][quarters].values[0] if not df[df['A'] == 'Government yly'].empty else np.nan
-    return income_model
-
-# Function to build balance sheet model
-def build_balance_sheet(df, quarters):
-    balance_model = {}
-    balance_model['Debt'] = df[df['A'] == 'Debt'][quarters].values[0] if not df[df['A'] == 'Debt'].empty else np.nan
-    balance_model['Stockholders_Equity'] = df[df['A'] == 'S/E'][quarters].values[0] if not df[df['A'] == 'S/E'].empty else np.nan
-    balance_model['Net_Cash'] = df[df['A'] == 'Net Cash'][quarters].values[0] if not df[df['A'] == 'Net Cash'].empty else np.nan
-    balance_model['AR'] = df[df['A'] == 'AR'][quarters].values[0] if not df[df['A'] == 'AR'].empty else np.nan
-    balance_model['PP&E'] = df[df['A'] == 'PP&E'][quarters].values[0] if not df[df['A'] == 'PP&E'].empty else np.nan
-    balance_model['Lease'] = df[df['A'] == 'Lease'][quarters].values[0] if not df[df['A'] == 'Lease'].empty else np.nan
-    balance_model['Other_Assets'] = df[df['A'] == 'Other Assets'][quarters].values[0] if not df[df['A'] == 'Other Assets'].empty else np.nan
-    balance_model['Assets'] = df[df['A'] == 'Assets'][quarters].values[0] if not df[df['A'] == 'Assets'].empty else np.nan
-    balance_model['AVP'] = df[df['A'] == 'AVP'][quarters].values[0] if not df[df['A'] == 'AVP'].empty else np.nan
-    balance_model['Accrued'] = df[df['A'] == 'Accrued'][quarters].values[0] if not df[df['A'] == 'Accrued'].empty else np.nan
-    balance_model['D/R'] = df[df['A'] == 'D/R'][quarters].values[0] if not df[df['A'] == 'D/R'].empty else np.nan
-    balance_model['Deposits'] = df[df['A'] == 'Deposits'][quarters].values[0] if not df[df['A'] == 'Deposits'].empty else np.nan
-    return balance_model
-
-# Function to build cash flow model
-def build_cash_flow_model(df, quarters):
-    cash_flow_model = {}
-    cash_flow_model['Cash_Flow_From_Operations'] = df[df['A'] == 'CFFO'][quarters].values[0] if not df[df['A'] == 'CFFO'].empty else np.nan
-    cash_flow_model['Purchases_of_Securities'] = df[df['A'] == 'Purchases of Securities'][quarters].values[0] if not df[df['A'] == 'Purchases of Securities'].empty else np.nan
-    cash_flow_model['Free_Cash_Flow_Calc'] = (cash_flow_model.get('Cash_Flow_From_Operations', np.zeros(len(quarters))) - 
-                                             abs(cash_flow_model.get('Purchases_of_Securities', np.zeros(len(quarters)))))
-    cash_flow_model['CFFF'] = df[df['A'] == 'CFFF'][quarters].values[0] if not df[df['A'] == 'CFFF'].empty else np.nan
-    cash_flow_model['FX'] = df[df['A'] == 'FX'][quarters].values[0] if not df[df['A'] == 'FX'].empty else np.nan
-    cash_flow_model['Cash_Increase'] = df[df['A'] == 'Cash Increase'][quarters].values[0] if not df[df['A'] == 'Cash Increase'].empty else np.nan
-    cash_flow_model['FCF'] = df[df['A'] == 'FCF'][quarters].values[0] if not df[df['A'] == 'FCF'].empty else np.nan
-    return cash_flow_model
-
-# Function to build operational metrics model
-def build_operational_model(df, quarters):
-    operational_model = {}
-    operational_model['ARPU_yly'] = df[df['A'] == 'ARPU yly'][quarters].values[0] if not df[df['A'] == 'ARPU yly'].empty else np.nan
-    operational_model['Revenue_yly'] = df[df['A'] == 'Revenue yly'][quarters].values[0] if not df[df['A'] == 'Revenue yly'].empty else np.nan
-    operational_model['Gross_Margin'] = df[df['A'] == 'Gross Margin'][quarters].values[0] if not df[df['A'] == 'Gross Margin'].empty else np.nan
-    operational_model['Operating_Margin'] = df[df['A'] == 'Operating Margin'][quarters].values[0] if not df[df['A'] == 'Operating Margin'].empty else np.nan
-    operational_model['Tax_Rate'] = df[df['A'] == 'Tax Rate'][quarters].values[0] if not df[df['A'] == 'Tax Rate'].empty else np.nan
-    operational_model['Headcount'] = df[df['A'] == 'Headcount'][quarters].values[0] if not df[df['A'] == 'Headcount'].empty else np.nan
-    operational_model['Headcount_y/y'] = df[df['A'] == 'Headcount y/y'][quarters].values[0] if not df[df['A'] == 'Headcount y/y'].empty else np.nan
-    return operational_model
-
-# Function to extend model for valuation
-def valuation_model(net_income, fcf, eps, shares, growth_rate=0.05, discount_rate=0.1, years=5):
-    valuation = {}
-    cash_flows = fcf if fcf.any() else net_income
-    if cash_flows.any():
-        terminal_value = cash_flows[-1] * (1 + growth_rate) / (discount_rate - growth_rate)
-        cash_flows_list = [cf * (1 + growth_rate) for cf in cash_flows[:-1]]
-        cash_flows_list.append(terminal_value / ((1 + discount_rate) ** (years - 1)))
-        dcf_value = sum(cf / ((1 + discount_rate) ** i) for i, cf in enumerate(cash_flows_list, 1))
-        valuation['DCF'] = dcf_value
-    else:
-        valuation['DCF'] = np.nan
-    
-    if eps.any() and shares.any():
-        pe_ratio = 15  # Assume a standard P/E ratio (adjust based on industry)
-        pe_value = eps[-1] * shares[-1] * pe_ratio
-        valuation['P/E'] = pe_value
-    else:
-        valuation['P/E'] = np.nan
-    
-    return valuation
-
-# Function to create and download Excel file
-def create_download_link(df_dict, filename="multi_page_financial_model.xlsx"):
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        for name, df in df_dict.items():
-            df.to_excel(writer, sheet_name=name)
-    b64 = base64.b64encode(output.getvalue()).decode()
-    href = f'<a href="data:application/vnd.openxmlformats-officedocument.spreadsheetml.sheet;base64,{b64}" download="{filename}">Download Excel File</a>'
-    return href
-
-import base64
+from finmodel import (FLOW_METRICS, XLSX_MIME, CompanyPanel, annual_totals, file_hash, growth_rates, model_workbook,
+                      rolling_sum, run_concurrently, write_archive, write_workbook)
+
+# Flow metrics summarized with trailing-twelve-month, annual and growth figures
+TREND_METRICS = ['Revenue', 'Net_Income', 'FCF', 'Cash_Flow_From_Operations', 'EPS']
+
+# Export choice -> (ZIP member format or None for one workbook, file name, mime type)
+EXPORT_FORMATS = {
+    "Single Excel workbook": (None, "multi_page_financial_model.xlsx", XLSX_MIME),
+    "ZIP of per-company Excel workbooks": ("xlsx", "financial_models_xlsx.zip", "application/zip"),
+    "ZIP of per-company Parquet files": ("parquet", "financial_models_parquet.zip", "application/zip"),
+}
+
+# Function to build the chosen export file; only called once a download is requested
+def build_export(df_dict, export_format):
+    archive_format = EXPORT_FORMATS[export_format][0]
+    if archive_format is None:
+        return write_workbook(BytesIO(), df_dict).getvalue()
+    return write_archive(BytesIO(), df_dict, archive_format).getvalue()
 
 # Streamlit app
 st.title("Multi-Page Financial Modeling Dashboard")
@@ -131,52 +31,108 @@ uploaded_files = st.file_uploader("Upload Excel files (one per company/page)", t
 
 if uploaded_files:
     financial_models = {}
-    for uploaded_file in uploaded_files:
-        st.subheader(f"Processing: {uploaded_file.name}")
-        
-        # Load data
-        df = load_financial_data(uploaded_file)
-        if df is None:
+    company_models = {}
+    uploads = [(uploaded_file.name, uploaded_file.getvalue()) for uploaded_file in uploaded_files]
+    workers = st.sidebar.slider("Worker processes", 1, os.cpu_count() or 1, min(4, os.cpu_count() or 1))
+
+    # Models are kept per file hash for this session, so reruns triggered by the widgets below
+    # only send new or changed uploads to the pool; removed uploads are dropped
+    digests = [file_hash(data) for _, data in uploads]
+    modelled = {digest: outcome for digest, outcome in st.session_state.get("workbook_models", {}).items()
+                if digest in digests}
+    st.session_state["workbook_models"] = modelled
+    pending = [(upload, digest) for upload, digest in zip(uploads, digests) if digest not in modelled]
+
+    def model_results():
+        for upload, digest in zip(uploads, digests):
+            if digest in modelled:
+                yield (upload, *modelled[digest])
+        if pending:
+            by_upload = dict(pending)
+            for upload, result, error in run_concurrently([upload for upload, _ in pending], model_workbook,
+                                                          max_workers=workers, processes=True):
+                modelled[by_upload[upload]] = (result, error)
+                yield upload, result, error
+
+    # Load, build and value every new workbook in a process pool, showing each as it finishes
+    progress = st.progress(0)
+    for done, ((name, _), result, error) in enumerate(model_results(), 1):
+        progress.progress(done / len(uploads))
+        st.subheader(f"Processing: {name}")
+        if error is not None:
+            st.error(f"Error processing file: {error}")
             continue
+        financial_model = result
+        quarters = list(financial_model.quarters)
+
+        # Display results as one metrics x quarters table
+        st.write(f"### Financial Model for {name}")
+        st.dataframe(financial_model.to_frame().T)
 
-        # Get quarters
-        quarters = get_quarters(df)
-
-        # Build financial models
-        income_statement = build_income_statement(df, quarters)
-        balance_sheet = build_balance_sheet(df, quarters)
-        cash_flow = build_cash_flow_model(df, quarters)
-        operational_model = build_operational_model(df, quarters)
-
-        # Combine all models
-        financial_model = {**income_statement, **balance_sheet, **cash_flow, **operational_model}
-
-        # Perform valuation
-        valuation = valuation_model(
-            financial_model.get('Net_Income', np.array([np.nan] * len(quarters))),
-            financial_model.get('FCF', np.array([np.nan] * len(quarters))),
-            financial_model.get('EPS', np.array([np.nan] * len(quarters))),
-            financial_model.get('Shares', np.array([np.nan] * len(quarters)))
-        )
-        financial_model['Valuation_DCF'] = valuation.get('DCF', np.nan)
-        financial_model['Valuation_PE'] = valuation.get('P/E', np.nan)
-
-        # Display results
-        st.write(f"### Financial Model for {uploaded_file.name}")
-        for key, value in financial_model.items():
-            st.write(f"{key}: {value}")
+        # Trailing-twelve-month sums of the charted flows
+        ttm = {metric: rolling_sum(financial_model[metric])
+               for metric in ('Net_Income', 'FCF') if metric in financial_model}
 
         # Add charts
         if 'Net_Income' in financial_model and not np.isnan(financial_model['Net_Income']).all():
-            st.line_chart(pd.DataFrame({'Net Income': financial_model['Net_Income']}, index=quarters))
+            st.line_chart(pd.DataFrame({'Net Income': financial_model['Net_Income'],
+                                        'Net Income (TTM)': ttm['Net_Income']}, index=quarters))
         if 'FCF' in financial_model and not np.isnan(financial_model['FCF']).all():
-            st.line_chart(pd.DataFrame({'Free Cash Flow': financial_model['FCF']}, index=quarters))
+            st.line_chart(pd.DataFrame({'Free Cash Flow': financial_model['FCF'],
+                                        'Free Cash Flow (TTM)': ttm['FCF']}, index=quarters))
+
+        with st.expander("TTM, Annual Roll-up and Growth"):
+            trend_rows = [metric for metric in TREND_METRICS if metric in financial_model]
+            trend = np.stack([financial_model[metric] for metric in trend_rows])
+            annual, years = annual_totals(trend, quarters)
+            st.write("Annual totals")
+            st.dataframe(pd.DataFrame(annual, index=trend_rows, columns=years))
+            st.write("TTM, q/q and y/y growth")
+            st.dataframe(pd.concat({
+                "TTM": pd.DataFrame(rolling_sum(trend), index=trend_rows, columns=quarters),
+                "q/q": pd.DataFrame(growth_rates(trend, 1), index=trend_rows, columns=quarters),
+                "y/y": pd.DataFrame(growth_rates(trend, 4), index=trend_rows, columns=quarters),
+            }))
 
         # Store model for download
-        financial_models[uploaded_file.name] = pd.DataFrame(financial_model, index=quarters)
-
-    # Download button
-    st.markdown(create_download_link(financial_models, "multi_page_financial_model.xlsx"), unsafe_allow_html=True)
+        financial_models[name] = financial_model.to_frame()
+        company_models[name] = financial_model
+
+    # Compare companies quarter by quarter; every analytic is computed over the whole panel at once
+    if len(company_models) > 1:
+        st.subheader("Peer Comparison")
+        panel = CompanyPanel.from_models({name: company_models[name] for name, _ in uploads if name in company_models})
+        if st.radio("Basis", ["Quarterly", "TTM"], horizontal=True) == "TTM":
+            # Only flows are summed; balance sheet lines, shares and valuations stay point-in-time
+            panel = panel.ttm(FLOW_METRICS)
+        panel = panel.with_margins()
+        quarter = st.selectbox("Quarter", panel.quarters, index=len(panel.quarters) - 1)
+        metric = st.selectbox("Metric", panel.metrics, index=panel.metrics.index("Net_Margin"))
+        comparison = pd.DataFrame({
+            "Value": panel.cross_section(quarter)[metric],
+            "q/q Growth": panel.growth().cross_section(quarter)[metric],
+            "y/y Growth": panel.growth(4).cross_section(quarter)[metric],
+            "Rank": panel.rank().cross_section(quarter)[metric],
+            "Percentile": panel.percentile().cross_section(quarter)[metric],
+        })
+        comparison["vs Peer Median"] = comparison["Value"] - panel.peer_median().loc[metric, quarter]
+        st.dataframe(comparison.sort_values("Rank"))
+
+    # Download, with companies in upload order rather than completion order. The file is only
+    # built on request and served by Streamlit's media endpoint instead of inlined into the page.
+    financial_models = {name: financial_models[name] for name, _ in uploads if name in financial_models}
+    export_format = st.selectbox("Export format", list(EXPORT_FORMATS))
+    # Keyed on upload contents, so re-uploading a changed workbook under the same name invalidates it
+    export_key = (tuple((name, file_hash(data)) for name, data in uploads), export_format)
+    if financial_models and st.button("Prepare Download"):
+        try:
+            st.session_state["export"] = (export_key, build_export(financial_models, export_format))
+        except Exception as e:
+            st.error(f"Error building export: {e}")
+    prepared_key, export_data = st.session_state.get("export", (None, None))
+    if prepared_key == export_key:
+        _, file_name, mime = EXPORT_FORMATS[export_format]
+        st.download_button("Download", data=export_data, file_name=file_name, mime=mime)
 
 else:
     st.write("Please upload at least one Excel file to begin.")